@@ -0,0 +1,114 @@
+# corpus.py - Synthetic resume PDFs for the benchmarks
+import os
+import random
+
+FIRST_NAMES = ['Aarav', 'Priya', 'Rohan', 'Ananya', 'Vikram', 'Sara', 'Kabir', 'Meera', 'Arjun', 'Neha',
+               'James', 'Maria', 'Chen', 'Fatima', 'Lucas', 'Aisha', 'Omar', 'Elena', 'Ravi', 'Zoe']
+LAST_NAMES = ['Sharma', 'Patel', 'Gupta', 'Iyer', 'Singh', 'Khan', 'Mehta', 'Reddy', 'Das', 'Nair',
+              'Smith', 'Garcia', 'Wang', 'Ali', 'Silva', 'Brown', 'Kim', 'Rossi', 'Kumar', 'Lopez']
+SKILLS = ['Python', 'Java', 'JavaScript', 'TypeScript', 'React', 'Angular', 'Node.js', 'Django', 'Flask',
+          'SQL', 'PostgreSQL', 'MongoDB', 'Redis', 'AWS', 'Azure', 'GCP', 'Docker', 'Kubernetes', 'Git',
+          'Terraform', 'Machine Learning', 'TensorFlow', 'PyTorch', 'Pandas', 'NumPy', 'Spark', 'Kafka',
+          'REST API', 'GraphQL', 'CI/CD', 'Linux', 'Agile', 'Scrum', 'HTML', 'CSS', 'C++', 'Go', 'Rust']
+COMPANIES = ['Infosys', 'TCS', 'Wipro', 'Flipkart', 'Zomato', 'Swiggy', 'Razorpay', 'Freshworks',
+             'Accenture', 'Google', 'Microsoft', 'Amazon', 'Acme Corp', 'Globex', 'Initech']
+TITLES = ['Software Engineer', 'Senior Software Engineer', 'Backend Developer', 'Full Stack Developer',
+          'Data Scientist', 'DevOps Engineer', 'Data Engineer', 'Frontend Developer', 'Team Lead']
+DEGREES = ['Bachelor of Technology in Computer Science', 'Master of Science in Data Science',
+           'Bachelor of Engineering in Information Technology', 'MBA in Technology Management',
+           'Master of Computer Applications']
+VERBS = ['Developed', 'Led', 'Designed', 'Implemented', 'Optimized', 'Managed', 'Built', 'Migrated',
+         'Automated', 'Improved', 'Reduced', 'Delivered', 'Mentored', 'Launched']
+OBJECTS = ['a payments platform', 'the search service', 'internal dashboards', 'data pipelines',
+           'the mobile backend', 'a recommendation engine', 'monitoring and alerting', 'the billing system',
+           'customer onboarding flows', 'a microservices architecture', 'the test infrastructure']
+OUTCOMES = ['cutting latency by {n}%', 'serving {n}k daily users', 'saving {n} engineer hours a month',
+            'increasing conversion by {n}%', 'reducing cloud costs by {n}%', 'with a team of {n} engineers']
+
+JOB_DESCRIPTION = (
+    "We are hiring a Senior Python Backend Engineer to build scalable REST APIs with Flask and Django. "
+    "You will design data pipelines on AWS using Docker and Kubernetes, work with PostgreSQL and Redis, "
+    "and mentor junior developers. Experience with machine learning, CI/CD and Agile teams is a plus. "
+    "Requires a degree in Computer Science and 5+ years of experience."
+)
+
+LINES_PER_PAGE = 52
+
+
+def resume_lines(rng, pages=1):
+    """Text lines of a plausible resume, roughly filling the given number of pages"""
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    skills = rng.sample(SKILLS, rng.randint(6, 14))
+    lines = [
+        name,
+        f"{name.split()[0].lower()}.{name.split()[1].lower()}@example.com | +91 98{rng.randint(10000000, 99999999)}",
+        "",
+        "SUMMARY",
+        f"{rng.choice(TITLES)} with {rng.randint(1, 15)} years of experience in {', '.join(skills[:3])}.",
+        "",
+        "SKILLS",
+        ", ".join(skills),
+        "",
+        "EDUCATION",
+        f"{rng.choice(DEGREES)}, {rng.randint(2005, 2022)}",
+        "",
+        "EXPERIENCE",
+    ]
+    while len(lines) < pages * LINES_PER_PAGE - 13:
+        lines.append(f"{rng.choice(TITLES)}, {rng.choice(COMPANIES)} ({rng.randint(2010, 2020)} - {rng.randint(2020, 2024)})")
+        for _ in range(rng.randint(3, 6)):
+            outcome = rng.choice(OUTCOMES).format(n=rng.randint(5, 60))
+            lines.append(f"- {rng.choice(VERBS)} {rng.choice(OBJECTS)} using {rng.choice(skills)}, {outcome}.")
+        lines.append("")
+    lines += ["ACHIEVEMENTS", f"- Won {rng.randint(1, 3)} internal hackathons", "",
+              "PROJECTS", f"- Open source contributor to {rng.choice(skills)} tooling"]
+    return lines
+
+
+def _escape(text):
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def pdf_bytes(lines):
+    """A minimal text PDF (Helvetica, A4), LINES_PER_PAGE lines per page"""
+    pages = [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)] or [[]]
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once the page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+    page_refs = []
+    for page_lines in pages:
+        text = "".join(f"({_escape(line)}) '\n" for line in page_lines)
+        stream = f"BT /F1 10 Tf 14 TL 50 800 Td\n{text}ET".encode('latin-1', errors='replace')
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (len(objects))
+        )
+        page_refs.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(page_refs), len(page_refs))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def generate_corpus(folder, count=20, pages=2, seed=0):
+    """Write count synthetic resumes of the given page count to folder and return their paths"""
+    os.makedirs(folder, exist_ok=True)
+    rng = random.Random(seed)
+    paths = []
+    for i in range(count):
+        path = os.path.join(folder, f"resume_{i + 1:04d}.pdf")
+        with open(path, 'wb') as f:
+            f.write(pdf_bytes(resume_lines(rng, pages)))
+        paths.append(path)
+    return paths
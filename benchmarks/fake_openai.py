@@ -0,0 +1,140 @@
+# fake_openai.py - Local OpenAI-compatible chat completions server for benchmarks
+#
+# Run on its own to point a development server at it:
+#   python benchmarks/fake_openai.py --port 8001 --latency 0.3 --error-rate 0.05
+#   OPENAI_API_KEY=fake OPENAI_BASE_URL=http://127.0.0.1:8001/v1 python resume-screening/app.py
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeOpenAI:
+    """
+    Answers POST /v1/chat/completions after latency seconds (plus up to
+    jitter more) with a resume analysis whose score is derived from the
+    prompt, so runs are repeatable. A share error_rate of requests fail
+    with error_status instead, 429s carrying a Retry-After header.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.2, jitter=0.0, error_rate=0.0, error_status=429,
+                 seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, name='fake-openai', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _roll(self):
+        """Return (delay, fail) for the next request"""
+        with self.lock:
+            self.requests += 1
+            fail = self.random.random() < self.error_rate
+            if fail:
+                self.errors += 1
+            return self.latency + self.random.random() * self.jitter, fail
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status, payload, headers=()):
+                data = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                if not self.path.rstrip('/').endswith('/chat/completions'):
+                    self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+                    return
+
+                delay, fail = fake._roll()
+                if fail:
+                    headers = [('Retry-After', '0.1')] if fake.error_status == 429 else []
+                    self._send_json(fake.error_status, {"error": {"message": "Injected failure"}}, headers)
+                    return
+                time.sleep(delay)
+
+                prompt = "".join(message.get('content', '') for message in body.get('messages', []))
+                content = json.dumps(fake_analysis(prompt))
+                self._send_json(200, {
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get('model', 'fake'),
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                                 "finish_reason": "stop"}],
+                    "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4,
+                              "total_tokens": (len(prompt) + len(content)) // 4}
+                })
+
+        return Handler
+
+
+def fake_analysis(prompt):
+    """Deterministic analysis for a prompt; batch prompts get one result per "RESUME <id>:" section"""
+    sections = re.split(r'^\s*RESUME (\S+):\s*$', prompt, flags=re.MULTILINE)
+    if len(sections) > 1:
+        return {"results": [{"id": label, **_fake_result(text)}
+                            for label, text in zip(sections[1::2], sections[2::2])]}
+    return _fake_result(prompt)
+
+
+def _fake_result(text):
+    score = int(hashlib.sha256(text.encode('utf-8')).hexdigest()[:8], 16) % 101
+    return {
+        "score": score,
+        "strengths": ["Relevant technical skills", "Solid project experience"],
+        "gaps": ["Limited leadership experience"]
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Fake OpenAI-compatible chat completions server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--latency', type=float, default=0.2, help="seconds per completion")
+    parser.add_argument('--jitter', type=float, default=0.0, help="extra random latency, up to this many seconds")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="share of requests that fail (0-1)")
+    parser.add_argument('--error-status', type=int, default=429)
+    args = parser.parse_args()
+
+    fake = FakeOpenAI(args.host, args.port, args.latency, args.jitter, args.error_rate, args.error_status)
+    print(f"Fake OpenAI server listening on {fake.base_url}")
+    try:
+        fake.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,341 @@
+# run.py - Benchmark the resume screening and analyzer hot paths
+#
+#   python benchmarks/run.py --resumes 20 --pages 2 --iterations 5 --output bench.json
+#   python benchmarks/run.py --baseline bench.json --max-regression 0.2
+#
+# Generates a synthetic resume corpus, starts a local fake OpenAI server and
+# drives both apps in-process (routes through the Flask test client). Each
+# benchmark reports throughput and p50/p95/p99 latency as JSON; with
+# --baseline, exits non-zero when a p95 latency regressed by more than
+# --max-regression.
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from corpus import JOB_DESCRIPTION, generate_corpus
+from fake_openai import FakeOpenAI
+
+
+def percentile(sorted_samples, q):
+    """Linearly interpolated q-th percentile (0-100) of already sorted samples"""
+    if not sorted_samples:
+        return None
+    position = (len(sorted_samples) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_samples) - 1)
+    return sorted_samples[lower] + (sorted_samples[upper] - sorted_samples[lower]) * (position - lower)
+
+
+def summarize(samples, wall_seconds, items_per_call=1):
+    """Latency percentiles in milliseconds and throughput in items per second"""
+    ordered = sorted(samples)
+    ms = lambda seconds: round(seconds * 1000, 3)
+    return {
+        "calls": len(samples),
+        "items_per_call": items_per_call,
+        "wall_seconds": round(wall_seconds, 4),
+        "throughput_per_second": round(len(samples) * items_per_call / wall_seconds, 3) if wall_seconds else None,
+        "latency_ms": {
+            "min": ms(ordered[0]),
+            "mean": ms(sum(ordered) / len(ordered)),
+            "p50": ms(percentile(ordered, 50)),
+            "p95": ms(percentile(ordered, 95)),
+            "p99": ms(percentile(ordered, 99)),
+            "max": ms(ordered[-1])
+        }
+    }
+
+
+def time_calls(fn, args_list, warmup=1):
+    """Call fn(*args) for each entry of args_list, after warmup untimed calls; return (samples, wall)"""
+    for args in args_list[:warmup]:
+        fn(*args)
+    samples = []
+    started = time.perf_counter()
+    for args in args_list:
+        call_started = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - call_started)
+    return samples, time.perf_counter() - started
+
+
+def add_app_path(folder):
+    """Make a flat app's sibling modules (extraction, merging, ...) importable"""
+    directory = os.path.join(REPO_DIR, folder)
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
+    return directory
+
+
+def load_app(folder, module_name):
+    """Import a flat app.py under module_name, with its sibling modules importable"""
+    directory = add_app_path(folder)
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(directory, 'app.py'))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+class Context:
+    """Shared corpus, fake LLM server and lazily imported apps"""
+
+    def __init__(self, args, workdir, fake):
+        self.args = args
+        self.workdir = workdir
+        self.fake = fake
+        self.pdf_paths = generate_corpus(os.path.join(workdir, 'corpus'), args.resumes, args.pages, args.seed)
+        self.pdf_data = []
+        for path in self.pdf_paths:
+            with open(path, 'rb') as f:
+                self.pdf_data.append(f.read())
+        self._screening = None
+        self._analyzer = None
+        self._texts = None
+
+    @property
+    def screening(self):
+        if self._screening is None:
+            self._screening = load_app('resume-screening', 'screening_app')
+        return self._screening
+
+    @property
+    def analyzer(self):
+        if self._analyzer is None:
+            self._analyzer = load_app('resume-analyzer', 'analyzer_app')
+        return self._analyzer
+
+    def extract(self, path):
+        """extract_text_from_pdf under the screening app's configured page and character budget"""
+        add_app_path('resume-screening')
+        from extraction import extract_text_from_pdf
+        from pipeline import load_config
+
+        config = load_config()
+        return extract_text_from_pdf(
+            path, max_pages=config['EXTRACTION_MAX_PAGES'], max_chars=config['EXTRACTION_MAX_CHARS']
+        )
+
+    @property
+    def texts(self):
+        if self._texts is None:
+            self._texts = [self.extract(path) for path in self.pdf_paths]
+        return self._texts
+
+    def per_resume(self):
+        """One call per corpus resume per iteration"""
+        return list(range(len(self.pdf_paths))) * self.args.iterations
+
+
+def bench_extract_text_from_pdf(ctx):
+    samples, wall = time_calls(lambda i: ctx.extract(ctx.pdf_paths[i]), [(i,) for i in ctx.per_resume()])
+    return {"extract_text_from_pdf": summarize(samples, wall)}
+
+
+def bench_merge_pdfs(ctx):
+    add_app_path('resume-screening')
+    from merging import write_merged_pdf
+
+    output = os.path.join(ctx.workdir, 'benchmark.pdf')
+    samples, wall = time_calls(
+        lambda: write_merged_pdf(ctx.pdf_paths, output), [()] * ctx.args.iterations
+    )
+    return {"merge_pdfs": summarize(samples, wall, len(ctx.pdf_paths))}
+
+
+def bench_analyze_resumes(ctx):
+    analyze = ctx.screening.analyze_resumes
+    texts = ctx.texts
+    samples, wall = time_calls(lambda: analyze(texts, JOB_DESCRIPTION), [()] * ctx.args.iterations)
+    return {"analyze_resumes": summarize(samples, wall, len(texts))}
+
+
+def bench_upload(ctx):
+    """POST /upload and wait for the background job to finish"""
+    module = ctx.screening
+    from jobs import TERMINAL_STATUSES
+
+    client = module.app.test_client()
+    client.post('/login', data={'email': 'hr@example.com', 'password': 'password123'})
+    request_samples = []
+    total_samples = []
+
+    def upload():
+        files = [(io.BytesIO(data), os.path.basename(path)) for path, data in zip(ctx.pdf_paths, ctx.pdf_data)]
+        started = time.perf_counter()
+        response = client.post(
+            '/upload', data={'job_description': JOB_DESCRIPTION, 'resumes': files},
+            content_type='multipart/form-data', headers={'Accept': 'application/json'}
+        )
+        request_samples.append(time.perf_counter() - started)
+        if response.status_code != 202:
+            raise RuntimeError(f"/upload returned {response.status_code}")
+        job_id = response.get_json()['job_id']
+        while module.job_store.progress(job_id)['status'] not in TERMINAL_STATUSES:
+            time.sleep(0.005)
+        total_samples.append(time.perf_counter() - started)
+
+    upload()
+    request_samples.clear()
+    total_samples.clear()
+    _, wall = time_calls(upload, [()] * ctx.args.iterations, warmup=0)
+    return {
+        "upload_request": summarize(request_samples, sum(request_samples), len(ctx.pdf_paths)),
+        "upload_end_to_end": summarize(total_samples, wall, len(ctx.pdf_paths))
+    }
+
+
+def bench_analyzer_analyze_resume(ctx):
+    analyze = ctx.analyzer.analyze_resume
+    texts = ctx.texts
+    samples, wall = time_calls(lambda i: analyze(texts[i]), [(i,) for i in ctx.per_resume()])
+    return {"analyzer.analyze_resume": summarize(samples, wall)}
+
+
+def bench_analyzer_route(ctx):
+    client = ctx.analyzer.app.test_client()
+
+    def post(i):
+        response = client.post(
+            '/analyze-resume', data={'resume': (io.BytesIO(ctx.pdf_data[i]), os.path.basename(ctx.pdf_paths[i]))},
+            content_type='multipart/form-data'
+        )
+        if response.status_code != 200:
+            raise RuntimeError(f"/analyze-resume returned {response.status_code}")
+
+    samples, wall = time_calls(post, [(i,) for i in ctx.per_resume()])
+    return {"analyzer./analyze-resume": summarize(samples, wall)}
+
+
+BENCHMARKS = {
+    'extract': bench_extract_text_from_pdf,
+    'merge': bench_merge_pdfs,
+    'analyze': bench_analyze_resumes,
+    'upload': bench_upload,
+    'analyzer': bench_analyzer_analyze_resume,
+    'analyzer-route': bench_analyzer_route,
+}
+
+
+def compare(report, baseline, max_regression):
+    """Messages for benchmarks whose p95 latency grew by more than max_regression (a fraction)"""
+    regressions = []
+    for name, result in report["benchmarks"].items():
+        previous = baseline.get("benchmarks", {}).get(name)
+        if not previous:
+            continue
+        before, after = previous["latency_ms"]["p95"], result["latency_ms"]["p95"]
+        if before and after > before * (1 + max_regression):
+            regressions.append(f"{name}: p95 {before}ms -> {after}ms (+{(after / before - 1) * 100:.0f}%)")
+    return regressions
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=REPO_DIR, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the resume screening and analyzer apps")
+    parser.add_argument('--resumes', type=int, default=20, help="number of synthetic resumes")
+    parser.add_argument('--pages', type=int, default=2, help="pages per resume")
+    parser.add_argument('--iterations', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--latency', type=float, default=0.2, help="fake LLM latency in seconds")
+    parser.add_argument('--jitter', type=float, default=0.05, help="extra random fake LLM latency in seconds")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="share of fake LLM requests that fail")
+    parser.add_argument('--backend', default='openai', choices=['openai', 'heuristic'],
+                        help="scoring backend; 'openai' talks to the fake server")
+    parser.add_argument('--batch-size', type=int, default=0, help="resumes per LLM request (SCORING_BATCH_SIZE)")
+    parser.add_argument('--only', nargs='+', choices=sorted(BENCHMARKS), help="run only these benchmarks")
+    parser.add_argument('--output', help="write the JSON report here instead of stdout")
+    parser.add_argument('--baseline', help="earlier JSON report to compare against")
+    parser.add_argument('--max-regression', type=float, default=0.2, help="allowed p95 growth over the baseline")
+    parser.add_argument('--verbose', action='store_true', help="show the apps' own output")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='resume-bench-')
+    fake = FakeOpenAI(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, seed=args.seed).start()
+
+    # Apps create their folders relative to the working directory; caches are
+    # off so every iteration does the full amount of work
+    os.environ.update({
+        'OPENAI_API_KEY': 'benchmark',
+        'OPENAI_BASE_URL': fake.base_url,
+        'ANALYSIS_CACHE_PATH': '',
+        'TEXT_CACHE_FOLDER': '',
+        'SCORING_BACKEND': args.backend,
+        'SCORING_BATCH_SIZE': str(args.batch_size),
+        'RESUME_ANALYZER_OFFLINE': os.environ.get('RESUME_ANALYZER_OFFLINE', '1'),
+        'RESUME_ANALYZER_WARMUP': '0',
+    })
+    cwd = os.getcwd()
+    os.chdir(workdir)
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "started_at": time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            "resumes": args.resumes,
+            "pages": args.pages,
+            "iterations": args.iterations,
+            "llm_latency": args.latency,
+            "llm_jitter": args.jitter,
+            "llm_error_rate": args.error_rate,
+            "backend": args.backend,
+            "batch_size": args.batch_size
+        },
+        "benchmarks": {}
+    }
+    try:
+        app_output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+        with app_output:
+            ctx = Context(args, workdir, fake)
+            for name, bench in BENCHMARKS.items():
+                if args.only and name not in args.only:
+                    continue
+                report["benchmarks"].update(bench(ctx))
+        report["meta"]["llm_requests"] = fake.requests
+        report["meta"]["llm_injected_errors"] = fake.errors
+    finally:
+        os.chdir(cwd)
+        fake.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.max_regression)
+        for message in regressions:
+            print(f"Regression: {message}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
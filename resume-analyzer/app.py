@@ -1,34 +1,96 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Request, request, jsonify, Response, current_app
 import os
+import io
+import tempfile
+import threading
+import zipfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
 import PyPDF2
 import re
+import json
+from collections import Counter
 from werkzeug.utils import secure_filename
-import spacy
-import nltk
-from nltk.corpus import stopwords
+from keyword_matcher import KeywordMatcher
+from nlp_resources import get_text_tools, start_warm_up, is_ready
+from metrics import metrics, instrument_app
 
-nltk.download('punkt')
-nltk.download('stopwords')
+class UploadBuffer(tempfile.SpooledTemporaryFile):
+    """
+    An uploaded file, kept in memory while its request's shared in-memory
+    budget lasts and moved to disk as soon as it would overrun it
+    """
 
-try:
-    nlp = spacy.load("en_core_web_sm")
-except:
-    os.system("python -m spacy download en_core_web_sm")
-    nlp = spacy.load("en_core_web_sm")
+    def __init__(self, budget):
+        super().__init__(mode='rb+')
+        self.budget = budget
+        self.held = 0
+        self.on_disk = False
+
+    def write(self, data):
+        if not self.on_disk:
+            if len(data) <= self.budget['left']:
+                self.budget['left'] -= len(data)
+                self.held += len(data)
+            else:
+                # What this file held is on disk now, so later files may use it
+                self.budget['left'] += self.held
+                self.held = 0
+                self.rollover()
+                self.on_disk = True
+        return super().write(data)
+
+
+class SpooledRequest(Request):
+    """
+    Keeps at most MAX_IN_MEMORY_UPLOAD_SIZE of a request's uploaded files in
+    memory, spooling the rest to disk; batch requests get the lower
+    BATCH_IN_MEMORY_UPLOAD_SIZE, as the whole body is parsed before any
+    resume is analyzed
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if not hasattr(self, 'upload_budget'):
+            if self.endpoint == 'analyze_batch':
+                budget = current_app.config['BATCH_IN_MEMORY_UPLOAD_SIZE']
+            else:
+                budget = current_app.config['MAX_IN_MEMORY_UPLOAD_SIZE']
+            self.upload_budget = {'left': budget}
+        return UploadBuffer(self.upload_budget)
 
 app = Flask(__name__, static_folder='static', static_url_path='')
+app.request_class = SpooledRequest
+
+# NLTK data loads in the background; set RESUME_ANALYZER_WARMUP=0 to load on first request instead
+if os.environ.get('RESUME_ANALYZER_WARMUP', '1') != '0':
+    start_warm_up()
 
-UPLOAD_FOLDER = 'uploads'
 ALLOWED_EXTENSIONS = {'pdf'}
-if not os.path.exists(UPLOAD_FOLDER):
-    os.makedirs(UPLOAD_FOLDER)
 
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
-app.config['MAX_CONTENT_LENGTH'] = 5 * 1024 * 1024
+# Limit per resume; the request limit is higher so batches of many resumes fit
+app.config['MAX_FILE_SIZE'] = 5 * 1024 * 1024
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('BATCH_MAX_CONTENT_LENGTH', 200 * 1024 * 1024))
+# Uploaded bytes kept in memory per request (all files together), the rest is spooled to disk
+app.config['MAX_IN_MEMORY_UPLOAD_SIZE'] = int(os.environ.get('MAX_IN_MEMORY_UPLOAD_SIZE', 8 * 1024 * 1024))
+app.config['BATCH_IN_MEMORY_UPLOAD_SIZE'] = int(os.environ.get('BATCH_IN_MEMORY_UPLOAD_SIZE', 1024 * 1024))
+app.config['BATCH_WORKERS'] = int(os.environ.get('BATCH_WORKERS', 0)) or os.cpu_count() or 1
+
+# Share (0-1) of requests whose per-stage timings are returned in a Server-Timing header
+app.config['METRICS_TRACE_SAMPLE_RATE'] = float(os.environ.get('METRICS_TRACE_SAMPLE_RATE', 0))
+# /metrics needs this bearer token if set, and is otherwise only served to
+# loopback addresses (set a token when running behind a reverse proxy)
+app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN') or None
+instrument_app(app, 'resume_analyzer', app.config['METRICS_TRACE_SAMPLE_RATE'], token=app.config['METRICS_TOKEN'])
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def extract_pdf_text(pdf_file):
+    with metrics.timer('extract'):
+        pdf_reader = PyPDF2.PdfReader(pdf_file)
+        return "".join(page.extract_text() or "" for page in pdf_reader.pages)
+
 TECH_KEYWORDS = {
     "languages": ["python", "java", "javascript", "c++", "typescript", "swift", "php", "ruby", "go", "kotlin"],
     "frameworks": ["react", "angular", "django", "flask", "spring", "vue", "node.js", "express", "laravel", "rails"],
@@ -37,13 +99,27 @@ TECH_KEYWORDS = {
     "methodologies": ["agile", "scrum", "kanban", "ci/cd", "devops", "test-driven", "microservices", "tdd", "bdd"]
 }
 
+# A JSON file of {"category": ["keyword", ...]} replaces the built-in vocabulary
+if os.environ.get('TECH_KEYWORDS_FILE'):
+    with open(os.environ['TECH_KEYWORDS_FILE']) as keywords_file:
+        TECH_KEYWORDS = {category: [kw.lower() for kw in keywords] for category, keywords in json.load(keywords_file).items()}
+
+EDUCATION_KEYWORDS = ["education", "university", "college", "degree", "bachelor", "master", "phd"]
+EXPERIENCE_KEYWORDS = ["experience", "work", "employment", "job", "career", "position"]
+ACHIEVEMENT_INDICATORS = ["increased", "decreased", "improved", "reduced", "achieved", "created", "implemented", "managed", "led", "developed", "built", "%", "percent", "million", "thousand"]
+
+# Built once at import; matching cost per resume is independent of vocabulary size
+TECH_KEYWORD_MATCHER = KeywordMatcher(kw for keywords in TECH_KEYWORDS.values() for kw in keywords)
+SECTION_MATCHER = KeywordMatcher(EDUCATION_KEYWORDS + EXPERIENCE_KEYWORDS + ACHIEVEMENT_INDICATORS)
+
 def analyze_resume(text):
     results = {"score": 0, "strengths": [], "weaknesses": [], "suggestions": [], "keyword_matches": {}}
     lines = text.split('\n')
     word_count = len(re.findall(r'\w+', text))
-    sentences = nltk.sent_tokenize(text)
-    words = nltk.word_tokenize(text.lower())
-    stop_words = set(stopwords.words('english'))
+    sent_tokenize, word_tokenize, stop_words = get_text_tools()
+    with metrics.timer('tokenize'):
+        sentences = sent_tokenize(text)
+        words = word_tokenize(text.lower())
     filtered_words = [w for w in words if w.isalnum() and w not in stop_words]
     page_estimate = int(word_count / 500) + 1
 
@@ -52,20 +128,18 @@ def analyze_resume(text):
     has_email = bool(re.search(email_pattern, text))
     has_phone = bool(re.search(phone_pattern, text))
 
-    education_keywords = ["education", "university", "college", "degree", "bachelor", "master", "phd"]
-    has_education = any(keyword in text.lower() for keyword in education_keywords)
-    experience_keywords = ["experience", "work", "employment", "job", "career", "position"]
-    has_experience = any(keyword in text.lower() for keyword in experience_keywords)
-    achievement_indicators = ["increased", "decreased", "improved", "reduced", "achieved", "created", "implemented", "managed", "led", "developed", "built", "%", "percent", "million", "thousand"]
-    has_achievements = any(indicator in text.lower() for indicator in achievement_indicators)
+    with metrics.timer('keyword_match'):
+        sections_found = SECTION_MATCHER.found(text.lower())
+        # A keyword counts every filtered word that contains it
+        matched = TECH_KEYWORD_MATCHER.count_in_words(Counter(filtered_words))
+    has_education = any(keyword in sections_found for keyword in EDUCATION_KEYWORDS)
+    has_experience = any(keyword in sections_found for keyword in EXPERIENCE_KEYWORDS)
+    has_achievements = any(indicator in sections_found for indicator in ACHIEVEMENT_INDICATORS)
 
     keyword_counts = {}
     for category, keywords in TECH_KEYWORDS.items():
-        keyword_counts[category] = []
-        for keyword in keywords:
-            count = sum(1 for word in filtered_words if keyword == word or keyword in word)
-            if count > 0:
-                keyword_counts[category].append({"keyword": keyword, "count": count})
+        keyword_counts[category] = [{"keyword": keyword, "count": matched[keyword]}
+                                    for keyword in keywords if matched.get(keyword)]
 
     total_keywords = sum(len(category_keywords) for category_keywords in keyword_counts.values())
     base_score = 50
@@ -129,10 +203,158 @@ def analyze_resume(text):
         "word_count": word_count,
         "estimated_pages": page_estimate
     }
+    metrics.inc('resumes_analyzed_total')
     return results
 
+def analyze_pdf_bytes(data):
+    """Extract and analyze one PDF; runs in a batch worker process"""
+    return analyze_resume(extract_pdf_text(io.BytesIO(data)))
+
+_batch_pool = None
+_batch_pool_lock = threading.Lock()
+
+# Batch workers are started by a fork server (spawned where there is none),
+# never forked from this threaded server, and load the NLP resources themselves
+BATCH_POOL_CONTEXT = multiprocessing.get_context(
+    'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+)
+
+def get_batch_pool():
+    global _batch_pool
+    with _batch_pool_lock:
+        if _batch_pool is None:
+            _batch_pool = ProcessPoolExecutor(
+                max_workers=app.config['BATCH_WORKERS'],
+                mp_context=BATCH_POOL_CONTEXT,
+                initializer=get_text_tools
+            )
+    return _batch_pool
+
+def drop_batch_pool(pool):
+    """Discard a broken pool (a worker died, e.g. out of memory), so the next batch starts a fresh one"""
+    global _batch_pool
+    with _batch_pool_lock:
+        if _batch_pool is pool:
+            _batch_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def analyze_alone(data):
+    """Retry a resume whose worker died on a fresh pool, by itself, so only the culprit fails"""
+    pool = get_batch_pool()
+    try:
+        return pool.submit(analyze_pdf_bytes, data).result()
+    except BrokenProcessPool:
+        drop_batch_pool(pool)
+        raise RuntimeError('The analysis process died (out of memory?)')
+
+def detach_uploads(files):
+    """
+    Take ownership of uploaded file streams so they stay open while a
+    streamed response is generated, after the request has been torn down.
+    """
+    uploads = []
+    for file in files:
+        if file and file.filename != '':
+            uploads.append((file.filename, file.stream))
+            file.stream = io.BytesIO()
+    return uploads
+
+def iter_batch_files(uploads):
+    """Yield (filename, bytes or None, error) for each PDF upload and each PDF inside uploaded zips"""
+    max_size = app.config['MAX_FILE_SIZE']
+    for original_filename, stream in uploads:
+        filename = secure_filename(original_filename)
+        if filename.lower().endswith('.zip'):
+            try:
+                archive = zipfile.ZipFile(stream)
+            except zipfile.BadZipFile:
+                yield filename, None, 'Invalid zip archive'
+                continue
+            with archive:
+                for member in archive.infolist():
+                    member_name = os.path.basename(member.filename)
+                    if member.is_dir() or member.filename.startswith('__MACOSX/') or not allowed_file(member_name):
+                        continue
+                    if member.file_size > max_size:
+                        yield member_name, None, 'File too large'
+                        continue
+                    yield member_name, archive.read(member), None
+        elif allowed_file(filename):
+            data = stream.read(max_size + 1)
+            if len(data) > max_size:
+                yield filename, None, 'File too large'
+            else:
+                yield filename, data, None
+        else:
+            yield filename, None, 'File type not allowed'
+
+@app.route('/analyze-resumes', methods=['POST'])
+def analyze_batch():
+    """
+    Analyze many PDFs (or zip archives of PDFs) uploaded as 'resumes'.
+    Results stream back as NDJSON, one line per resume in completion order.
+    At most BATCH_IN_MEMORY_UPLOAD_SIZE of the uploads (all files together)
+    stays in memory while the request is parsed, the rest is spooled to disk,
+    and only a few resumes per worker are read back into memory at a time.
+    """
+    uploads = detach_uploads(request.files.getlist('resumes'))
+    if not uploads:
+        return jsonify({'error': 'No selected files'}), 400
+
+    max_in_flight = 2 * app.config['BATCH_WORKERS']
+
+    def result_line(index, filename, data, pool, future):
+        # Batch analyses run in worker processes, so only their outcome is counted here
+        try:
+            try:
+                analysis = future.result()
+            except BrokenProcessPool:
+                drop_batch_pool(pool)
+                analysis = analyze_alone(data)
+            line = {'index': index, 'filename': filename, **analysis}
+            metrics.inc('resumes_analyzed_total')
+        except Exception as e:
+            line = {'index': index, 'filename': filename, 'error': str(e)}
+            metrics.inc('errors_total', stage='analyze')
+        return json.dumps(line) + '\n'
+
+    def generate():
+        in_flight = {}
+        try:
+            for index, (filename, data, error) in enumerate(iter_batch_files(uploads)):
+                if error:
+                    metrics.inc('errors_total', stage='upload')
+                    yield json.dumps({'index': index, 'filename': filename, 'error': error}) + '\n'
+                    continue
+                while len(in_flight) >= max_in_flight:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield result_line(*in_flight.pop(future), future)
+                pool = get_batch_pool()
+                try:
+                    future = pool.submit(analyze_pdf_bytes, data)
+                except BrokenProcessPool:
+                    drop_batch_pool(pool)
+                    pool = get_batch_pool()
+                    future = pool.submit(analyze_pdf_bytes, data)
+                in_flight[future] = (index, filename, data, pool)
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield result_line(*in_flight.pop(future), future)
+        finally:
+            for future in in_flight:
+                future.cancel()
+            for _, stream in uploads:
+                stream.close()
+
+    return Response(generate(), mimetype='application/x-ndjson')
+
 @app.route('/analyze-resume', methods=['POST'])
 def upload_file():
+    if request.content_length and request.content_length > app.config['MAX_FILE_SIZE']:
+        return jsonify({'error': 'File too large'}), 413
+
     if 'resume' not in request.files:
         return jsonify({'error': 'No file part'}), 400
 
@@ -141,27 +363,25 @@ def upload_file():
         return jsonify({'error': 'No selected file'}), 400
 
     if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
-
         try:
-            text = ""
-            with open(filepath, 'rb') as pdf_file:
-                pdf_reader = PyPDF2.PdfReader(pdf_file)
-                for page_num in range(len(pdf_reader.pages)):
-                    text += pdf_reader.pages[page_num].extract_text()
+            # Parse straight from the upload buffer; nothing is written to disk
+            file.stream.seek(0)
+            text = extract_pdf_text(file.stream)
 
             results = analyze_resume(text)
-            os.remove(filepath)
             return jsonify(results)
         except Exception as e:
-            if os.path.exists(filepath):
-                os.remove(filepath)
+            metrics.inc('errors_total', stage='analyze')
             return jsonify({'error': str(e)}), 500
 
     return jsonify({'error': 'File type not allowed'}), 400
 
+@app.route('/ready')
+def ready():
+    if is_ready():
+        return jsonify({'ready': True})
+    return jsonify({'ready': False}), 503
+
 @app.route('/')
 def serve_index():
     return app.send_static_file('index.html')
@@ -0,0 +1,78 @@
+from bisect import bisect_left
+from collections import deque
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over a fixed set of keywords. Built once, it
+    reports every (possibly overlapping) keyword occurrence in a single pass
+    over the text, so matching cost does not grow with the vocabulary size.
+    """
+
+    def __init__(self, keywords):
+        self.keywords = list(dict.fromkeys(keyword for keyword in keywords if keyword))
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+
+        for keyword_id, keyword in enumerate(self.keywords):
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                state = next_state
+            self._output[state].append(keyword_id)
+
+        # Breadth-first pass to link each state to its longest proper suffix state
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def iter_matches(self, text):
+        """Yield (end_index, keyword) for every keyword occurrence in text"""
+        goto, fail, output, keywords = self._goto, self._fail, self._output, self.keywords
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for keyword_id in output[state]:
+                yield index, keywords[keyword_id]
+
+    def count_in_words(self, word_counts):
+        """
+        For a {word: occurrences} mapping, return {keyword: total occurrences
+        of the words that contain keyword}. All distinct words are scanned in
+        one pass, joined by a separator no keyword contains.
+        """
+        words = [word for word in word_counts if "\n" not in word]
+        ends = []
+        offset = -1
+        for word in words:
+            offset += len(word) + 1
+            ends.append(offset)
+
+        seen = set()
+        counts = {}
+        for index, keyword in self.iter_matches("\n".join(words)):
+            word_index = bisect_left(ends, index)
+            if (keyword, word_index) not in seen:
+                seen.add((keyword, word_index))
+                counts[keyword] = counts.get(keyword, 0) + word_counts[words[word_index]]
+        return counts
+
+    def found(self, text):
+        """Set of keywords that occur anywhere in text"""
+        return {keyword for _, keyword in self.iter_matches(text)}
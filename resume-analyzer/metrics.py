@@ -0,0 +1,179 @@
+# metrics.py - Per-stage timers and counters, exposed in Prometheus text format
+#
+# Vendored: resume-screening/metrics.py and resume-analyzer/metrics.py are the
+# same file, as the two apps are deployed separately. Change both together.
+import contextvars
+import hmac
+import random
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from flask import Response, abort, g, request
+
+# Upper bounds (seconds) of the stage duration histogram buckets
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Addresses allowed to read /metrics when no token is configured
+LOOPBACK_ADDRESSES = {'127.0.0.1', '::1'}
+
+# Spans of the sampled request or job running in this context, or None
+_trace = contextvars.ContextVar('metrics_trace', default=None)
+
+
+def _label_text(labels):
+    if not labels:
+        return ""
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + "}"
+
+
+class Metrics:
+    """
+    In-process counters and stage-duration histograms. Recording a value is
+    a lock and a few additions; per-stage traces are only collected for the
+    share trace_sample_rate of requests and jobs.
+    """
+
+    def __init__(self, namespace='app', trace_sample_rate=0.0):
+        self.namespace = namespace
+        self.trace_sample_rate = trace_sample_rate
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, stage, seconds):
+        """Record one run of stage taking seconds"""
+        index = bisect_left(BUCKETS, seconds)
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = [[0] * (len(BUCKETS) + 1), 0.0, 0]
+            histogram[0][index] += 1
+            histogram[1] += seconds
+            histogram[2] += 1
+        spans = _trace.get()
+        if spans is not None:
+            spans.append((stage, seconds))
+
+    @contextmanager
+    def timer(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def start_trace(self):
+        """Begin collecting spans in this context if it is sampled; returns a token for end_trace"""
+        sampled = self.trace_sample_rate and random.random() < self.trace_sample_rate
+        return _trace.set([] if sampled else None)
+
+    def end_trace(self, token):
+        """Stop collecting and return the [(stage, seconds)] recorded since start_trace, if sampled"""
+        spans = _trace.get()
+        try:
+            _trace.reset(token)
+        except ValueError:
+            # Token from another context; just make sure nothing keeps recording
+            _trace.set(None)
+        return spans
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((stage, (list(h[0]), h[1], h[2])) for stage, h in self._histograms.items())
+
+        lines = []
+        typed = set()
+        for (name, labels), value in counters:
+            full_name = f"{self.namespace}_{name}"
+            if full_name not in typed:
+                typed.add(full_name)
+                lines.append(f"# TYPE {full_name} counter")
+            lines.append(f"{full_name}{_label_text(labels)} {value}")
+
+        if histograms:
+            name = f"{self.namespace}_stage_duration_seconds"
+            lines.append(f"# HELP {name} Time spent in each processing stage")
+            lines.append(f"# TYPE {name} histogram")
+            for stage, (buckets, total, count) in histograms:
+                cumulative = 0
+                for bound, bucket_count in zip(BUCKETS + (float('inf'),), buckets):
+                    cumulative += bucket_count
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f"{name}_bucket{_label_text((('stage', stage), ('le', le)))} {cumulative}")
+                lines.append(f"{name}_sum{_label_text((('stage', stage),))} {total}")
+                lines.append(f"{name}_count{_label_text((('stage', stage),))} {count}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+def format_spans(spans):
+    """Spans summed per stage, as a Server-Timing header value"""
+    totals = {}
+    for stage, seconds in spans:
+        totals[stage] = totals.get(stage, 0.0) + seconds
+    return ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in totals.items())
+
+
+def propagate_trace(fn):
+    """Wrap fn so it records into the calling context's trace when run on another thread"""
+    spans = _trace.get()
+    if spans is None:
+        return fn
+
+    def run(*args, **kwargs):
+        token = _trace.set(spans)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _trace.reset(token)
+    return run
+
+
+def instrument_app(app, namespace, trace_sample_rate=0.0, token=None):
+    """
+    Count requests per endpoint and status, time them as the 'request'
+    stage, send sampled requests' stage timings back in a Server-Timing
+    header, and serve everything on GET /metrics. /metrics needs
+    "Authorization: Bearer <token>" if a token is given, and is otherwise
+    only served to loopback addresses.
+    """
+    metrics.namespace = namespace
+    metrics.trace_sample_rate = trace_sample_rate
+
+    @app.before_request
+    def start_request_timer():
+        g.metrics_started = time.perf_counter()
+        g.metrics_trace = metrics.start_trace()
+
+    @app.after_request
+    def record_request(response):
+        started = g.pop('metrics_started', None)
+        if started is not None and request.endpoint != 'metrics_endpoint':
+            metrics.observe('request', time.perf_counter() - started)
+            metrics.inc('http_requests_total', endpoint=request.endpoint or 'unknown', status=response.status_code)
+        spans = metrics.end_trace(g.pop('metrics_trace')) if 'metrics_trace' in g else None
+        if spans:
+            response.headers['Server-Timing'] = format_spans(spans)
+        return response
+
+    @app.route('/metrics')
+    def metrics_endpoint():
+        if token:
+            supplied = request.headers.get('Authorization', '')
+            if not hmac.compare_digest(supplied.encode('utf-8'), f"Bearer {token}".encode('utf-8')):
+                abort(401)
+        elif request.remote_addr not in LOOPBACK_ADDRESSES:
+            abort(403)
+        return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
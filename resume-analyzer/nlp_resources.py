@@ -0,0 +1,98 @@
+import os
+import re
+import threading
+
+# Missing NLTK data is replaced by built-in fallbacks; it is only downloaded when
+# RESUME_ANALYZER_DOWNLOAD_NLTK is set (and RESUME_ANALYZER_OFFLINE is not)
+OFFLINE = os.environ.get('RESUME_ANALYZER_OFFLINE', '').lower() in ('1', 'true', 'yes')
+DOWNLOAD = not OFFLINE and os.environ.get('RESUME_ANALYZER_DOWNLOAD_NLTK', '').lower() in ('1', 'true', 'yes')
+
+# NLTK's English stopword list, used when the corpus is not installed
+FALLBACK_STOP_WORDS = frozenset("""
+i me my myself we our ours ourselves you you're you've you'll you'd your yours yourself yourselves
+he him his himself she she's her hers herself it it's its itself they them their theirs themselves
+what which who whom this that that'll these those am is are was were be been being have has had
+having do does did doing a an the and but if or because as until while of at by for with about
+against between into through during before after above below to from up down in out on off over
+under again further then once here there when where why how all any both each few more most other
+some such no nor not only own same so than too very s t can will just don don't should should've
+now d ll m o re ve y ain aren aren't couldn couldn't didn didn't doesn doesn't hadn hadn't hasn
+hasn't haven haven't isn isn't ma mightn mightn't mustn mustn't needn needn't shan shan't shouldn
+shouldn't wasn wasn't weren weren't won won't wouldn wouldn't
+""".split())
+
+_lock = threading.Lock()
+_text_tools = None
+
+
+def _load_nltk(check, packages):
+    """Run check(); if NLTK data is missing, download it (only if enabled) and retry"""
+    try:
+        return check()
+    except LookupError:
+        if not DOWNLOAD:
+            return None
+    import nltk
+    for package in packages:
+        nltk.download(package, quiet=True)
+    try:
+        return check()
+    except LookupError:
+        return None
+
+
+def _fallback_sent_tokenize(text):
+    return [sentence for sentence in re.split(r'(?<=[.!?])\s+', text) if sentence]
+
+
+def get_text_tools():
+    """
+    Return (sent_tokenize, word_tokenize, stop_words), loaded once per process.
+    Missing NLTK data is replaced by simple built-in equivalents, or
+    downloaded on first use when RESUME_ANALYZER_DOWNLOAD_NLTK is set.
+    If loading fails, the next call tries again.
+    """
+    global _text_tools
+    if _text_tools is not None:
+        return _text_tools
+    with _lock:
+        if _text_tools is None:
+            import nltk
+            from nltk.corpus import stopwords
+            from nltk.tokenize import TreebankWordTokenizer
+
+            if _load_nltk(lambda: nltk.sent_tokenize("Warm up."), ['punkt', 'punkt_tab']) is not None:
+                sent_tokenize, word_tokenize = nltk.sent_tokenize, nltk.word_tokenize
+            else:
+                print("NLTK punkt data not available; using a regex sentence splitter")
+                treebank = TreebankWordTokenizer()
+                sent_tokenize = _fallback_sent_tokenize
+
+                def word_tokenize(text):
+                    return [token for sentence in sent_tokenize(text) for token in treebank.tokenize(sentence)]
+
+            stop_words = _load_nltk(lambda: frozenset(stopwords.words('english')), ['stopwords'])
+            if stop_words is None:
+                print("NLTK stopwords corpus not available; using the built-in list")
+                stop_words = FALLBACK_STOP_WORDS
+
+            _text_tools = (sent_tokenize, word_tokenize, stop_words)
+    return _text_tools
+
+
+def warm_up():
+    try:
+        get_text_tools()
+    except Exception as e:
+        # Not fatal: the first request that needs the tools loads them again
+        print(f"NLP warm-up failed: {str(e)}")
+
+
+def start_warm_up():
+    """Load text tools on a background thread so the first request doesn't pay for it"""
+    threading.Thread(target=warm_up, name='nlp-warm-up', daemon=True).start()
+
+
+def is_ready():
+    """True once the text tools are loaded, by the warm-up or by a request"""
+    return _text_tools is not None
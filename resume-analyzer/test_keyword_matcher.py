@@ -0,0 +1,63 @@
+# test_keyword_matcher.py - KeywordMatcher must count exactly like the plain per-keyword scan it replaced
+#
+#   python -m unittest test_keyword_matcher    (or: python -m pytest)
+import random
+import unittest
+from collections import Counter
+
+from keyword_matcher import KeywordMatcher
+
+# Keywords that overlap each other (java/javascript/script, sql/mysql/postgresql,
+# c/c++/c#), repeat themselves (aa/aaa) or span several words
+KEYWORDS = ["java", "javascript", "script", "sql", "mysql", "postgresql", "c", "c++", "c#", "go", "django",
+            "node.js", ".net", "aa", "aaa", "machine learning", "power bi", "ci/cd", "rest"]
+
+
+def naive_word_counts(keywords, words):
+    """What analyze_resume used to do: count every word containing the keyword"""
+    counts = {}
+    for keyword in keywords:
+        count = sum(1 for word in words if keyword in word)
+        if count:
+            counts[keyword] = count
+    return counts
+
+
+def naive_found(keywords, text):
+    return {keyword for keyword in keywords if keyword in text}
+
+
+class KeywordMatcherTest(unittest.TestCase):
+
+    def setUp(self):
+        self.matcher = KeywordMatcher(KEYWORDS)
+
+    def test_overlapping_keywords_in_one_word(self):
+        words = ["javascript", "mysql", "postgresql", "aaaa", "c++", "django"]
+        self.assertEqual(self.matcher.count_in_words(Counter(words)), naive_word_counts(KEYWORDS, words))
+
+    def test_repeated_words_count_every_occurrence(self):
+        words = ["java", "java", "javascript", "sql", "java"]
+        counts = self.matcher.count_in_words(Counter(words))
+        self.assertEqual(counts, naive_word_counts(KEYWORDS, words))
+        self.assertEqual(counts["java"], 4)
+
+    def test_multi_word_keywords_in_text(self):
+        text = "built machine learning models, power bi dashboards and ci/cd for node.js and .net services"
+        self.assertEqual(self.matcher.found(text), naive_found(KEYWORDS, text))
+
+    def test_random_words_and_texts(self):
+        rng = random.Random(7)
+        alphabet = "acjvsqlmyptgrenodi+#./"
+        for _ in range(300):
+            words = ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 12)))
+                     for _ in range(rng.randint(0, 40))]
+            # Plant whole keywords too, so matches are not left to chance
+            words += [rng.choice(KEYWORDS).replace(" ", "") + rng.choice(["", "s", "x"]) for _ in range(5)]
+            self.assertEqual(self.matcher.count_in_words(Counter(words)), naive_word_counts(KEYWORDS, words))
+            text = " ".join(rng.choice(words + KEYWORDS) for _ in range(30))
+            self.assertEqual(self.matcher.found(text), naive_found(KEYWORDS, text))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+# analysis_cache.py - Persistent, content-addressed cache of LLM resume analyses
+import hashlib
+import json
+import re
+import threading
+import time
+
+from db import connect, open_store
+
+
+def normalize_job_description(job_description):
+    """Collapse whitespace and case so cosmetic edits don't miss the cache"""
+    return re.sub(r'\s+', ' ', job_description or '').strip().lower()
+
+
+def cache_key(resume_text, job_description, model, prompt_version):
+    """Hash of everything that determines the LLM's answer"""
+    digest = hashlib.sha256()
+    for part in (resume_text or '', normalize_job_description(job_description), model, str(prompt_version)):
+        digest.update(part.encode('utf-8', errors='replace'))
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+
+class AnalysisCache:
+    """
+    SQLite-backed store of {"score", "strengths", "gaps"} analyses.
+    Entries older than max_age seconds are dropped, and once the cache
+    holds more than max_entries the least recently used rows are evicted.
+    A limit of 0 disables that kind of eviction.
+    """
+
+    EVICT_EVERY = 50  # puts between eviction passes
+
+    def __init__(self, path, max_entries=10000, max_age=30 * 24 * 3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        self._lock = threading.Lock()
+
+        open_store(path)
+        with connect(path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS analyses (
+                    key TEXT PRIMARY KEY,
+                    analysis TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS analyses_last_used ON analyses (last_used)")
+
+    def get(self, key):
+        """Return the cached analysis dict for key, or None"""
+        now = time.time()
+        with connect(self.path) as conn:
+            row = conn.execute(
+                "SELECT analysis, created_at FROM analyses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self.max_age and now - row[1] > self.max_age:
+                conn.execute("DELETE FROM analyses WHERE key = ?", (key,))
+                row = None
+            if row is not None:
+                conn.execute("UPDATE analyses SET last_used = ? WHERE key = ?", (now, key))
+        with self._lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return json.loads(row[0]) if row is not None else None
+
+    def contains(self, key):
+        """True if an unexpired analysis is cached for key; unlike get, counts nothing and updates nothing"""
+        with connect(self.path) as conn:
+            row = conn.execute("SELECT created_at FROM analyses WHERE key = ?", (key,)).fetchone()
+        return row is not None and not (self.max_age and time.time() - row[0] > self.max_age)
+
+    def put(self, key, analysis):
+        now = time.time()
+        with connect(self.path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO analyses (key, analysis, created_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(analysis), now, now)
+            )
+        with self._lock:
+            self._puts += 1
+            evict = self._puts % self.EVICT_EVERY == 0
+        if evict:
+            self.evict()
+
+    def evict(self):
+        """Drop expired entries, then the least recently used ones above max_entries"""
+        with connect(self.path) as conn:
+            if self.max_age:
+                conn.execute("DELETE FROM analyses WHERE created_at < ?", (time.time() - self.max_age,))
+            if self.max_entries:
+                conn.execute("""
+                    DELETE FROM analyses WHERE key IN (
+                        SELECT key FROM analyses ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                    )
+                """, (self.max_entries,))
+
+    def stats(self):
+        with connect(self.path) as conn:
+            entries = conn.execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": entries}
@@ -1,16 +1,20 @@
 # app.py - Flask application for HR resume screening
-from flask import Flask, render_template, request, redirect, url_for, flash, session, send_file
+from flask import Flask, Request, current_app, render_template, request, redirect, url_for, flash, send_file, jsonify, Response, abort
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
 import os
 import uuid
-from PyPDF2 import PdfMerger
-import openai
-import pandas as pd
-import numpy as np
+import tempfile
 from dotenv import load_dotenv
-import json
+from extraction import has_text, save_with_digest
+from pipeline import load_config, create_text_extractor, create_analysis_cache, create_scorer, score_resumes
+from dedup import MAX_DISTANCE, group_duplicates, simhash
+from jobs import JobStore, JobQueue, COMPLETE, event_stream
+from resume_index import ResumeIndex
+from users import UserStore
+from merging import MergedPdfCache, start_sweeper
+from metrics import metrics, instrument_app, format_spans
 
 # Load environment variables
 load_dotenv()
@@ -21,11 +25,87 @@ print(f"API key loaded from .env: {'Yes' if api_key else 'No'}")
 if api_key:
     print(f"First few characters of API key: {api_key[:10]}...")
 
+class UploadBuffer(tempfile.SpooledTemporaryFile):
+    """
+    An uploaded file, kept in memory while its request's shared in-memory
+    budget lasts and moved to disk as soon as it would overrun it
+    """
+
+    def __init__(self, budget):
+        super().__init__(mode='rb+')
+        self.budget = budget
+        self.held = 0
+        self.on_disk = False
+
+    def write(self, data):
+        if not self.on_disk:
+            if len(data) <= self.budget['left']:
+                self.budget['left'] -= len(data)
+                self.held += len(data)
+            else:
+                # What this file held is on disk now, so later files may use it
+                self.budget['left'] += self.held
+                self.held = 0
+                self.rollover()
+                self.on_disk = True
+        return super().write(data)
+
+
+class SpooledRequest(Request):
+    """Keeps at most MAX_IN_MEMORY_UPLOAD_SIZE of a request's uploaded files in memory, spooling the rest to disk"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if not hasattr(self, 'upload_budget'):
+            self.upload_budget = {'left': current_app.config['MAX_IN_MEMORY_UPLOAD_SIZE']}
+        return UploadBuffer(self.upload_budget)
+
 app = Flask(__name__)
+app.request_class = SpooledRequest
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'default_secret_key')
-app.config['UPLOAD_FOLDER'] = 'uploads'
-app.config['MERGED_FOLDER'] = 'merged'
+# Storage locations; point every worker process (and node, on shared storage) at the same ones.
+# Absolute, as jobs store the paths of their uploads for whichever worker runs them
+app.config['UPLOAD_FOLDER'] = os.path.abspath(os.environ.get('UPLOAD_FOLDER', 'uploads'))
+app.config['MERGED_FOLDER'] = os.path.abspath(os.environ.get('MERGED_FOLDER', 'merged'))
+app.config['USER_STORE_PATH'] = os.environ.get('USER_STORE_PATH', os.path.join('data', 'users.sqlite3'))
 app.config['ALLOWED_EXTENSIONS'] = {'pdf'}
+# Largest request accepted (all resumes of an upload together), and how much of
+# it may be buffered in memory; uploads are written to disk straight away anyway
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_UPLOAD_SIZE', 200 * 1024 * 1024))
+app.config['MAX_IN_MEMORY_UPLOAD_SIZE'] = int(os.environ.get('MAX_IN_MEMORY_UPLOAD_SIZE', 1024 * 1024))
+
+# Extraction and scoring settings (see pipeline.load_config)
+app.config.update(load_config())
+
+# Resumes whose SimHash fingerprints differ in at most this many bits (0-3) are
+# scored once per group; -1 turns duplicate grouping off
+app.config['DEDUP_MAX_DISTANCE'] = min(int(os.environ.get('DEDUP_MAX_DISTANCE', MAX_DISTANCE)), MAX_DISTANCE)
+
+# Background screening jobs
+app.config['JOB_STORE_PATH'] = os.environ.get('JOB_STORE_PATH', os.path.join('data', 'jobs.sqlite3'))
+app.config['JOB_WORKERS'] = int(os.environ.get('JOB_WORKERS', 2))
+# Workers renew a lease on the jobs they run; a job whose lease is this many seconds
+# old (its worker died or was restarted) is run again, up to JOB_MAX_ATTEMPTS times
+app.config['JOB_LEASE_SECONDS'] = float(os.environ.get('JOB_LEASE_SECONDS', 120))
+app.config['JOB_MAX_ATTEMPTS'] = int(os.environ.get('JOB_MAX_ATTEMPTS', 3))
+
+# Full-text index of every uploaded resume, used to screen the existing pool
+app.config['RESUME_INDEX_PATH'] = os.environ.get('RESUME_INDEX_PATH', os.path.join('data', 'resume_index.sqlite3'))
+app.config['SCREEN_POOL_CANDIDATES'] = int(os.environ.get('SCREEN_POOL_CANDIDATES', 100))
+
+# Merged PDFs are built on first download and cached within these limits (0 = no limit)
+app.config['MERGED_CACHE_MAX_MB'] = int(os.environ.get('MERGED_CACHE_MAX_MB', 500))
+app.config['MERGED_CACHE_MAX_AGE_DAYS'] = float(os.environ.get('MERGED_CACHE_MAX_AGE_DAYS', 7))
+# Upload session folders are deleted after this many days (0 keeps them forever)
+app.config['UPLOAD_RETENTION_DAYS'] = float(os.environ.get('UPLOAD_RETENTION_DAYS', 30))
+app.config['RETENTION_SWEEP_INTERVAL'] = int(os.environ.get('RETENTION_SWEEP_INTERVAL', 3600))
+
+# Share (0-1) of requests and jobs whose per-stage timings are traced: returned
+# in a Server-Timing header for requests, printed for background jobs
+app.config['METRICS_TRACE_SAMPLE_RATE'] = float(os.environ.get('METRICS_TRACE_SAMPLE_RATE', 0))
+# /metrics needs this bearer token if set, and is otherwise only served to
+# loopback addresses (set a token when running behind a reverse proxy)
+app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN') or None
+instrument_app(app, 'resume_screening', app.config['METRICS_TRACE_SAMPLE_RATE'], token=app.config['METRICS_TOKEN'])
 
 # Create folders if they don't exist
 for folder in [app.config['UPLOAD_FOLDER'], app.config['MERGED_FOLDER']]:
@@ -36,13 +116,14 @@ login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'login'
 
-# Mock database for users (replace with a real database in production)
-users = {
+# Login accounts, shared by every worker process; the demo account is only
+# created in an empty store (add real ones with `python users.py add`)
+user_store = UserStore(app.config['USER_STORE_PATH'], defaults={
     'hr@example.com': {
         'password': generate_password_hash('password123'),
         'role': 'hr'
     }
-}
+})
 
 # User model for Flask-Login
 class User(UserMixin):
@@ -52,166 +133,187 @@ class User(UserMixin):
 
 @login_manager.user_loader
 def load_user(user_id):
-    if user_id in users:
-        return User(user_id, users[user_id]['role'])
+    user = user_store.get(user_id)
+    if user is not None:
+        return User(user_id, user['role'])
     return None
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in app.config['ALLOWED_EXTENSIONS']
 
-def merge_pdfs(pdf_files, output_filename):
-    merger = PdfMerger()
-    
-    for pdf in pdf_files:
-        merger.append(pdf)
-    
-    output_path = os.path.join(app.config['MERGED_FOLDER'], output_filename)
-    merger.write(output_path)
-    merger.close()
-    return output_path
+text_extractor = create_text_extractor(app.config)
+analysis_cache = create_analysis_cache(app.config)
+scorer = create_scorer(app.config, api_key, analysis_cache)
+print(f"Scoring backend: {scorer.name if scorer else 'unavailable'}")
 
-def extract_text_from_pdf(pdf_path):
-    """Extract text from a PDF file with improved error handling"""
+def analyze_resumes(resumes_text, job_description, on_result=None, limit=None, on_skipped=None):
+    """
+    Score resumes with the backend chosen at startup (SCORING_BACKEND),
+    pre-ranking them first when PRERANK_TOP_K is set; see pipeline.score_resumes
+    """
+    return score_resumes(scorer, resumes_text, job_description, on_result=on_result, limit=limit,
+                         prerank_top_k=app.config['PRERANK_TOP_K'], on_skipped=on_skipped)
+
+job_store = JobStore(app.config['JOB_STORE_PATH'])
+resume_index = ResumeIndex(app.config['RESUME_INDEX_PATH'])
+
+def process_screening_job(job_id):
+    """Run a queued screening job, tracing its stages when sampled"""
+    trace = metrics.start_trace()
     try:
-        import PyPDF2
-        
-        text = ""
-        with open(pdf_path, 'rb') as file:
-            reader = PyPDF2.PdfReader(file)
-            for page in reader.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
-        
-        if not text.strip():
-            print(f"Warning: No text extracted from {pdf_path}")
-            return "No text could be extracted from this PDF."
-        
-        return text
-    except Exception as e:
-        print(f"Error extracting text from {pdf_path}: {str(e)}")
-        return f"Error extracting text: {str(e)}"
+        with metrics.timer('job'):
+            run_screening_job(job_id)
+    finally:
+        spans = metrics.end_trace(trace)
+        if spans:
+            print(f"Trace for job {job_id}: {format_spans(spans)}")
 
-def analyze_resumes(resumes_text, job_description):
+def group_resumes(fingerprints, exclude_ids=()):
     """
-    Analyze resumes against a job description to find the best matches
-    Using OpenAI API as an example (can be replaced with local models like Ollama)
+    Return (representatives, previous): representatives[idx] is the first
+    resume of idx's group of exact or near duplicates in the batch, and
+    previous maps a representative to the indexed resume (not in
+    exclude_ids) it duplicates from an earlier upload.
     """
-    try:
-        api_key = os.environ.get('OPENAI_API_KEY')
-        print(f"API key in analyze_resumes: {'Yes' if api_key else 'No'}")
-        
-        if not api_key:
-            print("Error: OpenAI API key not found")
-            return [{"resume_idx": i, "score": 0, "strengths": ["API error: Missing API key"], 
-                     "gaps": ["Contact administrator"]} for i in range(len(resumes_text))]
-        
-        openai.api_key = api_key
-        
-        # Prepare results storage
-        results = []
-        
-        # For each resume, compare with job description
-        for idx, resume_text in enumerate(resumes_text):
-            try:
-                print(f"Processing resume {idx+1}/{len(resumes_text)}")
-                print(f"Resume text length: {len(resume_text)}")
-                
-                # Ensure resume text isn't empty
-                if not resume_text or len(resume_text.strip()) < 50:
-                    print(f"Warning: Resume {idx} has insufficient text")
-                    results.append({
-                        "resume_idx": idx,
-                        "score": 0,
-                        "strengths": ["Error: Could not extract sufficient text from PDF"],
-                        "gaps": ["Please check PDF quality and format"]
-                    })
-                    continue
-                
-                # Create a prompt for the language model
-                prompt = f"""
-                You are an HR assistant analyzing resumes for job fit.
-                
-                JOB DESCRIPTION:
-                {job_description}
-                
-                RESUME:
-                {resume_text[:4000]}  # Truncate if too long
-                
-                Based on the job description and resume, provide:
-                1. A matching score from 0-100
-                2. Top 3 reasons this candidate might be a good fit
-                3. Top 3 potential gaps in experience or skills
-                Format your response as JSON with keys: "score", "strengths", "gaps"
-                """
-                
-                # Try using the newer OpenAI client if available
-                try:
-                    # Try with newer client version first
-                    from openai import OpenAI
-                    client = OpenAI(api_key=api_key)
-                    response = client.chat.completions.create(
-                        model="gpt-3.5-turbo",
-                        messages=[
-                            {"role": "system", "content": "You analyze resumes and provide structured feedback as valid JSON."},
-                            {"role": "user", "content": prompt}
-                        ],
-                        response_format={"type": "json_object"}
-                    )
-                    analysis = response.choices[0].message.content
-                except ImportError:
-                    # Fall back to older client version
-                    print("Using older OpenAI client")
-                    response = openai.ChatCompletion.create(
-                        model="gpt-3.5-turbo",
-                        messages=[
-                            {"role": "system", "content": "You analyze resumes and provide structured feedback as valid JSON."},
-                            {"role": "user", "content": prompt}
-                        ],
-                        response_format={"type": "json_object"}
-                    )
-                    analysis = response.choices[0].message.content
-                
-                print(f"Got response for resume {idx}")
-                
-                # For a real app, use proper JSON parsing with error handling
-                analysis_json = json.loads(analysis)
-                
-                # Store the result with resume index
-                results.append({
-                    "resume_idx": idx,
-                    "score": analysis_json.get("score", 0),
-                    "strengths": analysis_json.get("strengths", []),
-                    "gaps": analysis_json.get("gaps", [])
-                })
-                
-            except json.JSONDecodeError as e:
-                print(f"JSON parsing error for resume {idx}: {str(e)}")
-                print(f"Raw response: {analysis if 'analysis' in locals() else 'No response'}")
-                results.append({
-                    "resume_idx": idx,
-                    "score": 0,
-                    "strengths": ["Error in parsing analysis"],
-                    "gaps": ["Technical error - contact administrator"]
-                })
-            except Exception as e:
-                # Handle errors - in production, log these properly
-                print(f"Error analyzing resume {idx}: {str(e)}")
-                results.append({
-                    "resume_idx": idx,
-                    "score": 0,
-                    "strengths": ["Error in analysis"],
-                    "gaps": ["Technical error - contact administrator"]
-                })
-        
-        # Sort by score descending and return top 10
-        results.sort(key=lambda x: x["score"], reverse=True)
-        return results[:10]
+    max_distance = app.config['DEDUP_MAX_DISTANCE']
+    if max_distance < 0:
+        return list(range(len(fingerprints))), {}
+    representatives = group_duplicates(fingerprints, max_distance)
+    previous = {}
+    for idx, rep in enumerate(representatives):
+        if idx == rep and fingerprints[idx] is not None:
+            match = resume_index.find_near_duplicate(fingerprints[idx], max_distance, exclude_ids=exclude_ids)
+            if match is not None:
+                previous[idx] = match
+    return representatives, previous
+
+def run_screening_job(job_id):
+    """Extract, then score, a queued screening job"""
+    job = job_store.get(job_id)
+    pdf_paths = job['pdf_paths']
+    # A re-screen reuses its source job's indexed text; resumes that had no
+    # usable text there have no resume id and stay empty
+    indexed = job['source_job_id'] is not None or all(resume_id is not None for resume_id in job['resume_ids'])
     
-    except Exception as e:
-        print(f"Critical error in analyze_resumes: {str(e)}")
-        return [{"resume_idx": i, "score": 0, "strengths": ["System error"], 
-                 "gaps": ["Contact administrator"]} for i in range(len(resumes_text))]
+    job_store.update(job_id, stage='extracting')
+    with metrics.timer('extract'):
+        if indexed:
+            # Already indexed (e.g. screening the existing pool): no PDF parsing needed
+            resumes_text = [resume['body'] if resume else '' for resume in resume_index.get_many(job['resume_ids'])]
+            for idx in range(len(resumes_text)):
+                job_store.update_resume(job_id, idx, 'extracted')
+        else:
+            resumes_text = text_extractor.extract_all(
+                pdf_paths,
+                on_extracted=lambda idx: job_store.update_resume(job_id, idx, 'extracted'),
+                digests=job['pdf_digests']
+            )
+    
+    # Group exact and near-duplicate resumes, within the batch and against
+    # earlier uploads, so each group is only scored once
+    with metrics.timer('dedup'):
+        fingerprints = [simhash(text) if has_text(text) else None for text in resumes_text]
+        representatives, previous = group_resumes(
+            fingerprints, exclude_ids={resume_id for resume_id in job['resume_ids'] if resume_id is not None}
+        )
+    job_store.set_duplicates(job_id, representatives, {rep: match['filename'] for rep, match in previous.items()})
+    
+    if not indexed:
+        # Add the new resumes to the searchable pool
+        resume_ids = resume_index.add_many(
+            [(text if has_text(text) else None, filename, pdf_path)
+             for text, filename, pdf_path in zip(resumes_text, job['filenames'], pdf_paths)],
+            session_id=job_id,
+            fingerprints=fingerprints
+        )
+        job_store.set_resume_ids(job_id, resume_ids)
+    
+    job_store.update(job_id, stage='scoring')
+    rep_indices = [idx for idx, rep in enumerate(representatives) if idx == rep]
+    members = {idx: [] for idx in rep_indices}
+    for idx, rep in enumerate(representatives):
+        members[rep].append(idx)
+    metrics.inc('duplicates_total', len(representatives) - len(rep_indices))
+    
+    # A near duplicate of an earlier upload whose analysis for this job
+    # description is cached is scored from the cache
+    scoring_texts = []
+    for idx in rep_indices:
+        match = previous.get(idx)
+        if match is not None and scorer is not None and scorer.is_cached(match['body'], job['job_description']):
+            scoring_texts.append(match['body'])
+        else:
+            scoring_texts.append(resumes_text[idx])
+    
+    scored = set()
+    
+    def record(result):
+        # Results are indexed by position in scoring_texts; every group member gets its representative's
+        for idx in members[rep_indices[result['resume_idx']]]:
+            scored.add(idx)
+            job_store.record_result(job_id, {**result, 'resume_idx': idx})
+    
+    def record_skipped(skipped):
+        # Left out by pre-ranking: kept, with the pre-rank score, but never sent to the LLM
+        for idx in members[rep_indices[skipped['resume_idx']]]:
+            scored.add(idx)
+            job_store.record_skipped(job_id, idx, skipped['prerank_score'])
+    
+    results = analyze_resumes(scoring_texts, job['job_description'], on_result=record, on_skipped=record_skipped)
+    
+    # Error results (e.g. a missing API key) are returned without being streamed
+    for result in results:
+        if rep_indices[result['resume_idx']] not in scored:
+            record(result)
+    
+    # Anything still unaccounted for is marked skipped, without a pre-rank score
+    for idx in range(len(pdf_paths)):
+        if idx not in scored:
+            job_store.update_resume(job_id, idx, 'skipped')
+    
+    # The merged PDF is only built if someone downloads it
+    job_store.update(job_id, stage='done', status=COMPLETE)
+
+merged_cache = MergedPdfCache(
+    app.config['MERGED_FOLDER'],
+    max_bytes=app.config['MERGED_CACHE_MAX_MB'] * 1024 * 1024,
+    max_age=app.config['MERGED_CACHE_MAX_AGE_DAYS'] * 24 * 3600
+)
+
+# Run as a script (python app.py), this module is imported again, as
+# __mp_main__, by each PDF extraction process; only the server runs jobs
+if __name__ != '__mp_main__':
+    job_queue = JobQueue(
+        job_store,
+        process_screening_job,
+        workers=app.config['JOB_WORKERS'],
+        lease_timeout=app.config['JOB_LEASE_SECONDS'],
+        max_attempts=app.config['JOB_MAX_ATTEMPTS']
+    )
+    start_sweeper(
+        app.config['UPLOAD_FOLDER'],
+        app.config['UPLOAD_RETENTION_DAYS'] * 24 * 3600,
+        merged_cache,
+        interval=app.config['RETENTION_SWEEP_INTERVAL']
+    )
+
+def get_user_job(job_id):
+    """Return the current user's job or abort with 404"""
+    job = job_store.get(job_id)
+    if job is None or job['user_id'] != current_user.id:
+        abort(404)
+    return job
+
+def wants_json():
+    return request.accept_mimetypes.best_match(['text/html', 'application/json']) == 'application/json'
+
+@app.errorhandler(413)
+def upload_too_large(error):
+    limit = f"{app.config['MAX_CONTENT_LENGTH'] // (1024 * 1024)} MB"
+    if wants_json():
+        return jsonify({"error": f"Upload too large (limit {limit})"}), 413
+    flash(f'Upload too large; send at most {limit} of resumes at a time', 'danger')
+    return redirect(url_for('upload'))
 
 @app.route('/')
 def index():
@@ -223,8 +325,9 @@ def login():
         email = request.form.get('email')
         password = request.form.get('password')
         
-        if email in users and check_password_hash(users[email]['password'], password):
-            user = User(email, users[email]['role'])
+        account = user_store.get(email) if email else None
+        if account is not None and check_password_hash(account['password'], password):
+            user = User(email, account['role'])
             login_user(user)
             return redirect(url_for('dashboard'))
         else:
@@ -276,82 +379,217 @@ def upload():
         session_folder = os.path.join(app.config['UPLOAD_FOLDER'], session_id)
         os.makedirs(session_folder, exist_ok=True)
         
-        # Save all files
+        # Save all files from their upload buffers, hashing them on the way
+        # so extraction can check the text cache without reading them back
         pdf_paths = []
-        for file in valid_files:
-            filename = secure_filename(file.filename)
-            file_path = os.path.join(session_folder, filename)
-            file.save(file_path)
-            pdf_paths.append(file_path)
-        
-        # Merge the PDFs
-        merged_filename = f"merged_{session_id}.pdf"
-        merged_path = merge_pdfs(pdf_paths, merged_filename)
+        pdf_digests = []
+        with metrics.timer('save'):
+            for file in valid_files:
+                filename = secure_filename(file.filename)
+                file_path = os.path.join(session_folder, filename)
+                pdf_digests.append(save_with_digest(file.stream, file_path))
+                pdf_paths.append(file_path)
         
-        # Store the job description
-        job_description = request.form['job_description']
+        # Queue extraction and scoring in the background
+        job_id = job_store.create(
+            current_user.id,
+            request.form['job_description'],
+            pdf_paths,
+            [secure_filename(f.filename) for f in valid_files],
+            job_id=session_id,
+            pdf_digests=pdf_digests
+        )
+        job_queue.submit(job_id)
         
-        # Extract text from each resume
-        resumes_text = [extract_text_from_pdf(pdf_path) for pdf_path in pdf_paths]
+        if wants_json():
+            return jsonify({
+                "job_id": job_id,
+                "status_url": url_for('job_status', job_id=job_id),
+                "events_url": url_for('job_events', job_id=job_id),
+                "results_url": url_for('results', job_id=job_id)
+            }), 202
+        return redirect(url_for('job_progress', job_id=job_id))
+    
+    return render_template('upload.html')
+
+@app.route('/screen-pool', methods=['GET', 'POST'])
+@login_required
+def screen_pool():
+    if request.method == 'POST':
+        job_description = request.form.get('job_description', '')
+        if not job_description.strip():
+            flash('Job description is required', 'danger')
+            return redirect(request.url)
         
-        # Analyze resumes against job description
-        results = analyze_resumes(resumes_text, job_description)
+        # Query the index for candidates, then score only those
+        candidate_ids = resume_index.search(job_description, limit=app.config['SCREEN_POOL_CANDIDATES'])
+        if not candidate_ids:
+            flash('No previously uploaded resumes match this job description', 'warning')
+            return redirect(request.url)
+        candidates = resume_index.get_many(candidate_ids)
+        print(f"Screening {len(candidates)} of {resume_index.count()} indexed resumes")
         
-        # Store file paths and results in session for the results page
-        session['pdf_paths'] = pdf_paths
-        session['merged_path'] = merged_path
-        session['results'] = results
-        session['original_filenames'] = [secure_filename(f.filename) for f in valid_files]
+        job_id = job_store.create(
+            current_user.id,
+            job_description,
+            [candidate['pdf_path'] for candidate in candidates],
+            [candidate['filename'] for candidate in candidates],
+            resume_ids=candidate_ids
+        )
+        job_queue.submit(job_id)
         
-        return redirect(url_for('results'))
+        if wants_json():
+            return jsonify({
+                "job_id": job_id,
+                "candidates": len(candidates),
+                "status_url": url_for('job_status', job_id=job_id),
+                "events_url": url_for('job_events', job_id=job_id),
+                "results_url": url_for('results', job_id=job_id)
+            }), 202
+        return redirect(url_for('job_progress', job_id=job_id))
     
-    return render_template('upload.html')
+    return render_template('screen_pool.html', pool_size=resume_index.count())
+
+@app.route('/jobs/<job_id>/rescreen', methods=['POST'])
+@login_required
+def rescreen(job_id):
+    """Score a finished job's resumes against a new job description, reusing their extracted text"""
+    source = get_user_job(job_id)
+    job_description = request.form.get('job_description', '')
+    if not job_description.strip():
+        if wants_json():
+            return jsonify({"error": "Job description is required"}), 400
+        flash('Job description is required', 'danger')
+        return redirect(url_for('results', job_id=job_id))
+    if source['status'] != COMPLETE:
+        if wants_json():
+            return jsonify({"error": "The screening has not finished yet"}), 409
+        flash('The screening has not finished yet', 'warning')
+        return redirect(url_for('job_progress', job_id=job_id))
+    
+    # Same files and index entries, no PDFs saved, merged or parsed again
+    new_job_id = job_store.create(
+        current_user.id,
+        job_description,
+        source['pdf_paths'],
+        source['filenames'],
+        resume_ids=source['resume_ids'],
+        pdf_digests=source['pdf_digests'],
+        source_job_id=job_id
+    )
+    job_queue.submit(new_job_id)
+    
+    if wants_json():
+        return jsonify({
+            "job_id": new_job_id,
+            "source_job_id": job_id,
+            "status_url": url_for('job_status', job_id=new_job_id),
+            "events_url": url_for('job_events', job_id=new_job_id),
+            "results_url": url_for('results', job_id=new_job_id)
+        }), 202
+    return redirect(url_for('job_progress', job_id=new_job_id))
+
+@app.route('/jobs/<job_id>')
+@login_required
+def job_progress(job_id):
+    get_user_job(job_id)
+    return render_template('job.html', job_id=job_id)
+
+@app.route('/jobs/<job_id>/status')
+@login_required
+def job_status(job_id):
+    get_user_job(job_id)
+    return jsonify(job_store.progress(job_id))
+
+@app.route('/jobs/<job_id>/events')
+@login_required
+def job_events(job_id):
+    get_user_job(job_id)
+    return Response(
+        event_stream(job_store, job_id),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 @app.route('/results')
 @login_required
 def results():
-    if 'results' not in session:
+    # Without a job id, show the user's latest screening (from the job store, so any worker can answer)
+    job_id = request.args.get('job_id') or job_store.latest_job_id(current_user.id)
+    if not job_id:
         flash('No results to display', 'warning')
         return redirect(url_for('upload'))
     
+    job = get_user_job(job_id)
+    if job['status'] != COMPLETE:
+        return redirect(url_for('job_progress', job_id=job_id))
+    
+    # Sorting, filtering and paging all happen in the results store
+    sort = request.args.get('sort', 'score')
+    order = request.args.get('order', 'desc')
+    min_score = request.args.get('min_score', type=float)
+    max_score = request.args.get('max_score', type=float)
+    per_page = min(max(request.args.get('per_page', 20, type=int), 1), 100)
+    page = max(request.args.get('page', 1, type=int), 1)
+    hide_duplicates = request.args.get('hide_duplicates') == '1'
+    page_results, total = job_store.results_page(
+        job_id, sort=sort, descending=(order != 'asc'), min_score=min_score, max_score=max_score,
+        page=page, per_page=per_page, hide_duplicates=hide_duplicates
+    )
+    pages = max((total + per_page - 1) // per_page, 1)
+    
+    if wants_json():
+        return jsonify({
+            "job_id": job_id, "page": page, "pages": pages, "per_page": per_page,
+            "total": total, "results": page_results
+        })
+    
     return render_template(
         'results.html',
-        results=session['results'],
-        filenames=session['original_filenames'],
-        merged_path=session['merged_path']
+        results=page_results,
+        job_id=job_id,
+        job_description=job['job_description'],
+        total=total,
+        page=page,
+        pages=pages,
+        per_page=per_page,
+        offset=(page - 1) * per_page,
+        sort=sort,
+        order=order,
+        min_score=min_score,
+        max_score=max_score,
+        hide_duplicates=hide_duplicates
     )
 
-@app.route('/download/<path:filename>')
+@app.route('/download/<job_id>')
 @login_required
-def download_file(filename):
-    return send_file(filename, as_attachment=True)
+def download_file(job_id):
+    """Send the job's merged PDF, merging and streaming it on first request"""
+    job = get_user_job(job_id)
+    download_name = f"merged_{job_id}.pdf"
+    
+    cached_path = merged_cache.get(job_id)
+    if cached_path:
+        return send_file(cached_path, as_attachment=True, download_name=download_name)
+    
+    pdf_paths = [path for path in job['pdf_paths'] if os.path.exists(path)]
+    if not pdf_paths:
+        flash('The uploaded resumes for this screening have expired', 'warning')
+        return redirect(url_for('results', job_id=job_id))
+    
+    return Response(
+        merged_cache.stream(job_id, pdf_paths),
+        mimetype='application/pdf',
+        headers={'Content-Disposition': f'attachment; filename={download_name}'}
+    )
 
 @app.route('/debug_api', methods=['GET'])
 @login_required
 def debug_api():
     try:
-        api_key = os.environ.get('OPENAI_API_KEY')
-        if not api_key:
+        if scorer is None:
             return "API key not found in environment"
-        
-        # Try with newer client version first
-        try:
-            from openai import OpenAI
-            client = OpenAI(api_key=api_key)
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": "Say hello"}],
-                max_tokens=10
-            )
-            return f"API test successful: {response.choices[0].message.content}"
-        except ImportError:
-            # Fall back to older client version
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": "Say hello"}],
-                max_tokens=10
-            )
-            return f"API test successful: {response.choices[0].message.content}"
+        return f"API test successful ({scorer.name}): {scorer.ping()}"
     except Exception as e:
         return f"API test failed: {str(e)}"
 
@@ -0,0 +1,220 @@
+# batch_screen.py - Screen a directory of resume PDFs from the command line, without the web app
+#
+#   python batch_screen.py /data/resumes --job-description jd.txt --output results.csv
+#   python batch_screen.py /data/resumes --job-description jd.txt --output results.parquet
+#
+# Resumes are extracted and scored chunk by chunk, so memory stays bounded no
+# matter how many PDFs there are, and each chunk's results are appended to the
+# output as soon as they are scored. A checkpoint file next to the output
+# records what has been written; after an interruption, running the same
+# command again carries on where it stopped. Parquet output is a directory of
+# part files (readable with pandas.read_parquet) and needs pyarrow.
+#
+# Only the extraction and scoring pipeline is loaded, not the web app: no
+# upload folders, job store, users or background threads. Caches are off
+# unless --cache-dir (or ANALYSIS_CACHE_PATH / TEXT_CACHE_FOLDER) is given.
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+from dotenv import load_dotenv
+
+from pipeline import create_analysis_cache, create_scorer, create_text_extractor, load_config, score_resumes
+
+# Output columns; strengths and gaps are lists, joined with "; " in CSV output
+COLUMNS = ['file', 'score', 'strengths', 'gaps']
+
+
+def find_pdfs(folder, recursive=False):
+    """Paths of the PDFs in folder, relative to it, in a stable order"""
+    if not recursive:
+        return sorted(entry.name for entry in os.scandir(folder)
+                      if entry.is_file() and entry.name.lower().endswith('.pdf'))
+    paths = []
+    for directory, subdirectories, filenames in os.walk(folder):
+        subdirectories.sort()
+        paths.extend(os.path.relpath(os.path.join(directory, filename), folder)
+                     for filename in sorted(filenames) if filename.lower().endswith('.pdf'))
+    return paths
+
+
+class Checkpoint:
+    """
+    Progress of a run, saved atomically as JSON after every chunk: the files
+    done, and how much of the output (CSV bytes or Parquet parts) they fill.
+    """
+
+    def __init__(self, path, job_digest, output_format):
+        self.path = path
+        self.state = {"job_description": job_digest, "format": output_format, "done": [], "csv_bytes": 0,
+                      "parts": 0}
+
+    def load(self):
+        """Restore a previous run's progress; returns False if there is none"""
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return False
+        for name in ('job_description', 'format'):
+            if state.get(name) != self.state[name]:
+                raise SystemExit(f"Checkpoint {self.path} is for a different {name.replace('_', ' ')}; "
+                                 f"pass --restart to start over")
+        self.state = state
+        return True
+
+    def save(self):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)), suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.path)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class CsvWriter:
+    """Appends result rows to one CSV file"""
+
+    def __init__(self, path, checkpoint, resume):
+        self.path = path
+        self.checkpoint = checkpoint
+        if resume:
+            # Drop anything written after the last checkpoint, such as a half-written chunk
+            if not os.path.exists(path) or os.path.getsize(path) < checkpoint.state["csv_bytes"]:
+                raise SystemExit(f"{path} is missing rows recorded in {checkpoint.path}; pass --restart")
+            os.truncate(path, checkpoint.state["csv_bytes"])
+        else:
+            open(path, 'w').close()
+
+    def write(self, rows):
+        frame = pd.DataFrame(rows, columns=COLUMNS)
+        for column in ('strengths', 'gaps'):
+            frame[column] = frame[column].map("; ".join)
+        with open(self.path, 'a', newline='', encoding='utf-8') as f:
+            frame.to_csv(f, header=self.checkpoint.state["csv_bytes"] == 0, index=False)
+            f.flush()
+            os.fsync(f.fileno())
+            self.checkpoint.state["csv_bytes"] = f.tell()
+
+
+class ParquetWriter:
+    """Writes each chunk's rows as a new part file in the output directory"""
+
+    def __init__(self, path, checkpoint, resume):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise SystemExit("Parquet output needs pyarrow (pip install pyarrow); or write a .csv instead")
+        self.path = path
+        self.checkpoint = checkpoint
+        os.makedirs(path, exist_ok=True)
+        keep = checkpoint.state["parts"] if resume else 0
+        for name in os.listdir(path):
+            if name.startswith('part-') and name.endswith('.parquet') and int(name[5:-8]) >= keep:
+                os.remove(os.path.join(path, name))
+
+    def write(self, rows):
+        part = self.checkpoint.state["parts"]
+        frame = pd.DataFrame(rows, columns=COLUMNS)
+        frame.to_parquet(os.path.join(self.path, f"part-{part:05d}.parquet"), index=False)
+        self.checkpoint.state["parts"] = part + 1
+
+
+def extract_chunk(text_extractor, folder, names):
+    return text_extractor.extract_all([os.path.join(folder, name) for name in names])
+
+
+def score_chunk(scorer, names, texts, job_description):
+    """Score one chunk of extracted resumes; returns its rows in the order of names"""
+    rows = [None] * len(names)
+    # Every resume is scored: a per-chunk shortlist would depend on how files fall into chunks
+    for result in score_resumes(scorer, texts, job_description):
+        idx = result["resume_idx"]
+        rows[idx] = [names[idx], result["score"], result["strengths"], result["gaps"]]
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Screen a directory of resume PDFs against a job description")
+    parser.add_argument('folder', help="directory containing the resume PDFs")
+    parser.add_argument('--job-description', required=True, help="text file holding the job description")
+    parser.add_argument('--output', required=True, help="results file: .csv, or .parquet (a directory of parts)")
+    parser.add_argument('--format', choices=['csv', 'parquet'], help="output format (default: from --output)")
+    parser.add_argument('--chunk-size', type=int, default=100, help="resumes extracted and scored together")
+    parser.add_argument('--checkpoint', help="progress file (default: <output>.checkpoint)")
+    parser.add_argument('--recursive', action='store_true', help="include PDFs in subdirectories")
+    parser.add_argument('--restart', action='store_true', help="ignore any checkpoint and start over")
+    parser.add_argument('--cache-dir', help="keep extracted text and LLM analyses here, for reuse across runs")
+    args = parser.parse_args()
+
+    load_dotenv()
+    config = load_config()
+    for key, name in (('ANALYSIS_CACHE_PATH', 'analyses.sqlite3'), ('TEXT_CACHE_FOLDER', 'text')):
+        if args.cache_dir:
+            config[key] = os.path.join(args.cache_dir, name)
+        elif key not in os.environ:
+            config[key] = ''
+    scorer = create_scorer(config, os.environ.get('OPENAI_API_KEY'), create_analysis_cache(config))
+    if scorer is None:
+        raise SystemExit("No scoring backend available; set OPENAI_API_KEY or SCORING_BACKEND")
+    with open(args.job_description, encoding='utf-8') as f:
+        job_description = f.read()
+    if not job_description.strip():
+        raise SystemExit(f"{args.job_description} is empty")
+    output_format = args.format or ('parquet' if args.output.lower().endswith('.parquet') else 'csv')
+    chunk_size = max(args.chunk_size, 1)
+
+    checkpoint = Checkpoint(
+        args.checkpoint or f"{args.output.rstrip(os.sep)}.checkpoint",
+        hashlib.sha256(job_description.encode('utf-8')).hexdigest(),
+        output_format
+    )
+    resume = not args.restart and checkpoint.load()
+    writer = (ParquetWriter if output_format == 'parquet' else CsvWriter)(args.output, checkpoint, resume)
+    text_extractor = create_text_extractor(config)
+
+    done = set(checkpoint.state["done"])
+    names = [name for name in find_pdfs(args.folder, args.recursive) if name not in done]
+    total = len(names) + len(done)
+    if done:
+        print(f"Resuming: {len(done)} of {total} resumes already screened")
+    chunks = [names[i:i + chunk_size] for i in range(0, len(names), chunk_size)]
+
+    started = time.perf_counter()
+    screened = 0
+    try:
+        # Extract the next chunk while the current one is being scored; at
+        # most two chunks of text are held in memory
+        with ThreadPoolExecutor(max_workers=1) as prefetch:
+            upcoming = prefetch.submit(extract_chunk, text_extractor, args.folder, chunks[0]) if chunks else None
+            for number, chunk in enumerate(chunks):
+                texts = upcoming.result()
+                if number + 1 < len(chunks):
+                    upcoming = prefetch.submit(extract_chunk, text_extractor, args.folder, chunks[number + 1])
+                writer.write(score_chunk(scorer, chunk, texts, job_description))
+                checkpoint.state["done"].extend(chunk)
+                checkpoint.save()
+                screened += len(chunk)
+                elapsed = time.perf_counter() - started
+                print(f"Screened {len(done) + screened} of {total} resumes "
+                      f"({screened / elapsed:.1f}/s, chunk {number + 1} of {len(chunks)})", file=sys.stderr)
+    except KeyboardInterrupt:
+        print(f"Interrupted after {len(done) + screened} of {total} resumes; "
+              f"run the same command again to resume", file=sys.stderr)
+        sys.exit(130)
+    finally:
+        text_extractor.shutdown()
+    checkpoint.remove()
+    print(f"Screened {total} resumes into {args.output}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
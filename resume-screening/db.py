@@ -0,0 +1,43 @@
+# db.py - SQLite stores shared by every server process (jobs, users, resume index, analysis cache)
+import os
+import sqlite3
+from contextlib import contextmanager
+
+
+def open_store(path):
+    """Create the store's folder and switch it to WAL mode, so readers and the writer don't block each other"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with connect(path) as conn:
+        conn.execute("PRAGMA journal_mode=WAL")
+
+
+@contextmanager
+def connect(path):
+    """A connection to the store, committed if the block succeeds and always closed; rows are sqlite3.Row"""
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def add_missing_columns(conn, table, columns):
+    """Bring a store created by an older version up to date"""
+    existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    for name, definition in columns.items():
+        if name not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+
+
+def drop_columns(conn, table, columns):
+    """Remove columns older versions used; SQLite before 3.35 cannot, and just keeps them unused"""
+    if sqlite3.sqlite_version_info < (3, 35, 0):
+        return
+    existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    for name in columns:
+        if name in existing:
+            conn.execute(f"ALTER TABLE {table} DROP COLUMN {name}")
@@ -0,0 +1,78 @@
+# dedup.py - SimHash fingerprints for grouping exact and near-duplicate resumes
+import hashlib
+
+import numpy as np
+
+from prerank import tokenize
+
+# Fingerprints within this many differing bits are treated as the same resume
+MAX_DISTANCE = 3
+
+# The 64-bit fingerprint is split into MAX_DISTANCE + 1 bands; two fingerprints
+# within MAX_DISTANCE bits must agree on at least one band (pigeonhole), so
+# candidates are found by exact band lookups instead of comparing every pair
+BANDS = MAX_DISTANCE + 1
+BAND_BITS = 64 // BANDS
+
+SHINGLE_SIZE = 3
+
+
+def simhash(text):
+    """64-bit SimHash of the text's overlapping word 3-grams"""
+    tokens = tokenize(text)
+    if len(tokens) < SHINGLE_SIZE:
+        shingles = [" ".join(tokens)] if tokens else []
+    else:
+        shingles = [" ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)]
+    if not shingles:
+        return 0
+    hashes = np.frombuffer(
+        b"".join(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest() for shingle in shingles),
+        dtype=np.uint8
+    ).reshape(len(shingles), 8)
+    # Each bit votes +1/-1 per shingle; the fingerprint keeps the majority
+    votes = np.unpackbits(hashes, axis=1).sum(axis=0, dtype=np.int64) * 2 - len(shingles)
+    return int.from_bytes(np.packbits(votes > 0).tobytes(), 'big')
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+def bands(fingerprint):
+    """(band number, band value) pairs used for candidate lookups"""
+    mask = (1 << BAND_BITS) - 1
+    return [(band, (fingerprint >> (band * BAND_BITS)) & mask) for band in range(BANDS)]
+
+
+def to_signed(fingerprint):
+    """Store a 64-bit fingerprint in a SQLite INTEGER (signed 64-bit)"""
+    return fingerprint - (1 << 64) if fingerprint >= (1 << 63) else fingerprint
+
+
+def from_signed(value):
+    return value + (1 << 64) if value < 0 else value
+
+
+def group_duplicates(fingerprints, max_distance=MAX_DISTANCE):
+    """
+    For each fingerprint (None for resumes without text), return the index of
+    its group's representative: the first resume of its group of exact or
+    near duplicates. Resumes with no duplicate, or no fingerprint, map to
+    themselves.
+    """
+    representative = list(range(len(fingerprints)))
+    buckets = {}
+    for idx, fingerprint in enumerate(fingerprints):
+        if fingerprint is None:
+            continue
+        candidates = set()
+        for key in bands(fingerprint):
+            candidates.update(buckets.setdefault(key, []))
+        for other in sorted(candidates):
+            if hamming(fingerprint, fingerprints[other]) <= max_distance:
+                representative[idx] = representative[other]
+                break
+        for key in bands(fingerprint):
+            buckets[key].append(idx)
+    return representative
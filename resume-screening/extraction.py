@@ -0,0 +1,225 @@
+# extraction.py - Parallel, cached PDF text extraction for resume screening
+import hashlib
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+import PyPDF2
+
+from metrics import metrics
+
+NO_TEXT_MESSAGE = "No text could be extracted from this PDF."
+ERROR_PREFIX = "Error extracting text: "
+
+# Extraction processes are started by a fork server (spawned where there is
+# none), never forked from the server itself: a fork of a process running job,
+# sweeper and request threads can inherit a lock one of them holds and hang
+POOL_CONTEXT = multiprocessing.get_context(
+    'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+)
+
+
+def file_digest(pdf_path):
+    """SHA-256 of a file's contents, read in chunks"""
+    digest = hashlib.sha256()
+    with open(pdf_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def save_with_digest(stream, path):
+    """Write an upload stream to path and return its SHA-256, in a single pass"""
+    digest = hashlib.sha256()
+    stream.seek(0)
+    with open(path, 'wb') as file:
+        for chunk in iter(lambda: stream.read(1024 * 1024), b''):
+            digest.update(chunk)
+            file.write(chunk)
+    return digest.hexdigest()
+
+
+def read_pdf_text(file, max_pages=0, max_chars=0):
+    """
+    Join the text of the pages of an open PDF file object, stopping after
+    max_pages pages or once max_chars characters are collected (0: no limit)
+    """
+    reader = PyPDF2.PdfReader(file)
+    parts = []
+    length = 0
+    for page_number, page in enumerate(reader.pages):
+        if max_pages and page_number >= max_pages:
+            break
+        page_text = page.extract_text()
+        if page_text:
+            parts.append(page_text)
+            parts.append("\n")
+            length += len(page_text) + 1
+            if max_chars and length >= max_chars:
+                break
+    return "".join(parts)
+
+
+def extract_text_from_pdf(pdf_path, max_pages=0, max_chars=0):
+    """Extract text from a PDF file with improved error handling"""
+    try:
+        with open(pdf_path, 'rb') as file:
+            text = read_pdf_text(file, max_pages, max_chars)
+
+        if not text.strip():
+            print(f"Warning: No text extracted from {pdf_path}")
+            return NO_TEXT_MESSAGE
+
+        return text
+    except Exception as e:
+        print(f"Error extracting text from {pdf_path}: {str(e)}")
+        return f"{ERROR_PREFIX}{str(e)}"
+
+
+def has_text(text):
+    """False for the placeholder messages returned when extraction fails"""
+    return bool(text) and text != NO_TEXT_MESSAGE and not text.startswith(ERROR_PREFIX)
+
+
+class TextCache:
+    """Extracted text stored on disk as <folder>/<sha256 of the PDF>.txt"""
+
+    def __init__(self, folder):
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+
+    def _path(self, digest):
+        return os.path.join(self.folder, f"{digest}.txt")
+
+    def get(self, digest):
+        try:
+            with open(self._path(digest), 'r', encoding='utf-8') as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, digest, text):
+        # Write to a temp file and rename so concurrent readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self.folder, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as file:
+            file.write(text)
+        os.replace(tmp_path, self._path(digest))
+
+
+class TextExtractor:
+    """
+    Extracts text from many PDFs at once. Files already seen (by content
+    hash) come from the text cache; the rest are parsed on a process pool
+    so large batches are not serialized behind the GIL. With max_pages or
+    max_chars set, parsing stops early, so long documents cost no more than
+    the text the scorer will actually read.
+    """
+
+    def __init__(self, cache=None, max_workers=None, max_pages=0, max_chars=0):
+        self.cache = cache
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pages = max_pages
+        self.max_chars = max_chars
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def _get_pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=POOL_CONTEXT)
+            return self._pool
+
+    def _drop_pool(self, pool):
+        """Discard a broken pool, so the next extraction starts a fresh one"""
+        with self._pool_lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _extract_alone(self, extract, pdf_path):
+        pool = self._get_pool()
+        try:
+            return pool.submit(extract, pdf_path).result()
+        except BrokenProcessPool:
+            self._drop_pool(pool)
+            print(f"Error extracting text from {pdf_path}: extraction process died")
+            return f"{ERROR_PREFIX}the extraction process died (out of memory?)"
+
+    def _extract_on_pool(self, extract, pdf_paths):
+        """
+        Yield the text of each PDF, in order, parsed on the process pool. If
+        a worker dies (e.g. killed for running out of memory on a hostile
+        PDF), the pool is replaced and the files it took down with it are
+        retried one at a time, so only the culprit fails.
+        """
+        pool = self._get_pool()
+        futures = [pool.submit(extract, pdf_path) for pdf_path in pdf_paths]
+        for pdf_path, future in zip(pdf_paths, futures):
+            try:
+                yield future.result()
+            except BrokenProcessPool:
+                self._drop_pool(pool)
+                yield self._extract_alone(extract, pdf_path)
+
+    def _cache_key(self, digest):
+        # Text extracted under a budget is cached apart from the full text
+        if self.max_pages or self.max_chars:
+            return f"{digest}-{self.max_pages}p{self.max_chars}c"
+        return digest
+
+    def extract_all(self, pdf_paths, on_extracted=None, digests=None):
+        """
+        Return the text of each PDF, in the order given.
+        on_extracted(idx) is called as each file's text becomes available.
+        digests, if known (e.g. computed while saving), spare re-reading files to hash them.
+        """
+        texts = [None] * len(pdf_paths)
+        digests = list(digests) if digests else [None] * len(pdf_paths)
+        pending = []
+
+        for i, pdf_path in enumerate(pdf_paths):
+            if self.cache is not None:
+                try:
+                    if digests[i] is None:
+                        digests[i] = file_digest(pdf_path)
+                except OSError as e:
+                    print(f"Error hashing {pdf_path}: {str(e)}")
+                else:
+                    texts[i] = self.cache.get(self._cache_key(digests[i]))
+            if texts[i] is None:
+                pending.append(i)
+            elif on_extracted is not None:
+                on_extracted(i)
+
+        print(f"Extracting text from {len(pending)} of {len(pdf_paths)} PDFs "
+              f"({len(pdf_paths) - len(pending)} cached)")
+        if self.cache is not None:
+            metrics.inc("text_cache_hits_total", len(pdf_paths) - len(pending))
+
+        extract = partial(extract_text_from_pdf, max_pages=self.max_pages, max_chars=self.max_chars)
+        if len(pending) > 1 and self.max_workers > 1:
+            extracted = self._extract_on_pool(extract, [pdf_paths[i] for i in pending])
+        else:
+            extracted = map(extract, [pdf_paths[i] for i in pending])
+
+        for i, text in zip(pending, extracted):
+            texts[i] = text
+            metrics.inc("pdfs_extracted_total")
+            if text.startswith(ERROR_PREFIX):
+                metrics.inc("errors_total", stage="extract")
+            if self.cache is not None and digests[i] is not None and not text.startswith(ERROR_PREFIX):
+                self.cache.put(self._cache_key(digests[i]), text)
+            if on_extracted is not None:
+                on_extracted(i)
+
+        return texts
+
+    def shutdown(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
@@ -0,0 +1,43 @@
+# gunicorn.conf.py - Multi-process production server for resume screening
+#
+#   SECRET_KEY=... gunicorn -c gunicorn.conf.py
+#
+# Users, jobs, results, the resume index and the caches all live in SQLite
+# stores (WAL mode) and folders shared by the worker processes, so any worker
+# can answer any request: log in on one, upload on another, follow progress and
+# read results on a third. Every worker must see the same SECRET_KEY and the
+# same storage paths (UPLOAD_FOLDER, MERGED_FOLDER, *_PATH, TEXT_CACHE_FOLDER).
+#
+# Screening jobs are queued in the job store and claimed by whichever worker
+# is free; a worker that dies or restarts mid-job stops renewing its lease and
+# the job is run again elsewhere after JOB_LEASE_SECONDS. Per process:
+# /metrics and the scoring rate limits (SCORING_REQUESTS_PER_MINUTE,
+# SCORING_TOKENS_PER_MINUTE) cover one worker.
+import multiprocessing
+import os
+
+wsgi_app = 'app:app'
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+
+# One process per core; each serves requests on a pool of threads, so slow
+# uploads, PDF downloads and progress event streams don't hold a whole process
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count()))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+
+# gthread workers check in from their main loop, so this only catches a hung
+# worker, not a long event stream; graceful_timeout lets running jobs finish
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 120))
+keepalive = 5
+
+# The app starts threads and process pools when imported, which must not be
+# forked, so each worker imports it itself; no max_requests either, as
+# recycling a worker would restart the jobs it is running
+preload_app = False
+
+# Share the cores' PDF extraction processes between the workers instead of
+# every worker starting one per core
+os.environ.setdefault('EXTRACTION_WORKERS', str(max(1, multiprocessing.cpu_count() // workers)))
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
@@ -0,0 +1,84 @@
+# heuristic.py - Deterministic, in-process keyword scorer (no LLM, no network)
+from metrics import metrics
+from prerank import tokenize
+from scoring import error_result
+
+# Same categories as resume-analyzer's TECH_KEYWORDS, plus a few common data/ML skills
+TECH_KEYWORDS = {
+    "languages": ["python", "java", "javascript", "c++", "typescript", "swift", "php", "ruby", "go", "kotlin",
+                  "c#", "rust", "scala", "sql"],
+    "frameworks": ["react", "angular", "django", "flask", "spring", "vue", "node.js", "express", "laravel", "rails",
+                   "fastapi", ".net"],
+    "databases": ["mysql", "mongodb", "postgresql", "redis", "oracle", "elasticsearch", "firebase", "datomic"],
+    "cloud": ["aws", "azure", "gcp", "cloud", "serverless", "docker", "kubernetes", "terraform", "lambda"],
+    "methodologies": ["agile", "scrum", "kanban", "ci/cd", "devops", "test-driven", "microservices", "tdd", "bdd"],
+    "data": ["machine learning", "deep learning", "data science", "pandas", "numpy", "tensorflow", "pytorch",
+             "spark", "kafka", "airflow", "tableau", "power bi"],
+    "tools": ["git", "linux", "jenkins", "rest", "graphql", "html", "css", "jira"]
+}
+
+# Weight of the listed-skill coverage in the score; the rest is overall term coverage
+KEYWORD_WEIGHT = 0.6
+
+
+class HeuristicScorer:
+    """
+    Scores resumes by how many of the job description's skills and terms
+    they mention. Needs no API key or network and gives the same result for
+    the same input, so screening can run fully on-box.
+    """
+
+    name = "heuristic"
+    model = "heuristic"
+
+    def __init__(self, keywords=None):
+        keywords = [kw for kws in (keywords or TECH_KEYWORDS).values() for kw in kws]
+        # A keyword matches when all of its tokens occur in the text
+        self.keywords = [(kw, frozenset(tokenize(kw))) for kw in dict.fromkeys(keywords) if tokenize(kw)]
+
+    def ping(self):
+        return "Heuristic scorer ready (no API calls)"
+
+    def is_cached(self, resume_text, job_description):
+        # Scoring is cheap enough that nothing is cached
+        return False
+
+    def _keywords_in(self, tokens):
+        return [kw for kw, kw_tokens in self.keywords if kw_tokens <= tokens]
+
+    def score_one(self, idx, resume_text, job_description):
+        if not resume_text or len(resume_text.strip()) < 50:
+            print(f"Warning: Resume {idx} has insufficient text")
+            return error_result(idx, ["Error: Could not extract sufficient text from PDF"],
+                                ["Please check PDF quality and format"])
+
+        jd_tokens = set(tokenize(job_description))
+        resume_tokens = set(tokenize(resume_text))
+        wanted = self._keywords_in(jd_tokens)
+        found = set(self._keywords_in(resume_tokens))
+        matched = [kw for kw in wanted if kw in found]
+        missing = [kw for kw in wanted if kw not in matched]
+
+        term_coverage = len(jd_tokens & resume_tokens) / len(jd_tokens) if jd_tokens else 0.0
+        if wanted:
+            score = KEYWORD_WEIGHT * len(matched) / len(wanted) + (1 - KEYWORD_WEIGHT) * term_coverage
+        else:
+            score = term_coverage
+
+        strengths = [f"Mentions {kw}" for kw in matched[:3]]
+        if len(strengths) < 3:
+            strengths.append(f"Covers {round(term_coverage * 100)}% of the job description's key terms")
+        gaps = [f"No mention of {kw}" for kw in missing[:3]]
+        return {"resume_idx": idx, "score": round(score * 100), "strengths": strengths, "gaps": gaps}
+
+    def score_all(self, resumes_text, job_description, on_result=None, indices=None):
+        """Same contract as ScoringEngine.score_all"""
+        indices = list(range(len(resumes_text)) if indices is None else indices)
+        results = []
+        with metrics.timer("heuristic_score"):
+            for idx in indices:
+                result = self.score_one(idx, resumes_text[idx], job_description)
+                results.append(result)
+                if on_result is not None:
+                    on_result(result)
+        return results
@@ -0,0 +1,411 @@
+# jobs.py - Background screening jobs backed by a local SQLite store
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+
+from db import add_missing_columns, connect, drop_columns, open_store
+from metrics import metrics
+
+# Job status values; a job is finished once it reaches one of TERMINAL_STATUSES
+QUEUED, RUNNING, COMPLETE, FAILED = 'queued', 'running', 'complete', 'failed'
+TERMINAL_STATUSES = {COMPLETE, FAILED}
+
+# Sort keys accepted by JobStore.results_page
+RESULT_SORT_COLUMNS = {'score': 'score', 'prerank': 'prerank_score', 'name': 'filename'}
+
+
+class JobStore:
+    """Screening jobs and per-resume progress, persisted in SQLite"""
+
+    def __init__(self, path):
+        self.path = path
+        open_store(path)
+        with connect(path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    user_id TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    stage TEXT NOT NULL,
+                    job_description TEXT NOT NULL,
+                    pdf_paths TEXT NOT NULL,
+                    filenames TEXT NOT NULL,
+                    pdf_digests TEXT,
+                    source_job_id TEXT,
+                    owner TEXT,
+                    heartbeat_at REAL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS job_resumes (
+                    job_id TEXT NOT NULL,
+                    resume_idx INTEGER NOT NULL,
+                    filename TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    score REAL,
+                    resume_id INTEGER,
+                    prerank_score REAL,
+                    strengths TEXT,
+                    gaps TEXT,
+                    duplicate_of INTEGER,
+                    seen_as TEXT,
+                    PRIMARY KEY (job_id, resume_idx)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS job_resumes_score ON job_resumes (job_id, score)")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_user ON jobs (user_id, created_at)")
+            add_missing_columns(conn, 'jobs', {
+                'pdf_digests': 'TEXT', 'source_job_id': 'TEXT', 'owner': 'TEXT', 'heartbeat_at': 'REAL',
+                'attempts': 'INTEGER NOT NULL DEFAULT 0'
+            })
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+            add_missing_columns(conn, 'job_resumes', {
+                'resume_id': 'INTEGER', 'prerank_score': 'REAL', 'strengths': 'TEXT', 'gaps': 'TEXT',
+                'duplicate_of': 'INTEGER', 'seen_as': 'TEXT'
+            })
+            # Results now live in job_resumes and merged PDFs in the merged PDF cache
+            drop_columns(conn, 'jobs', ['merged_path', 'results'])
+
+    def create(self, user_id, job_description, pdf_paths, filenames, job_id=None, resume_ids=None,
+               pdf_digests=None, source_job_id=None):
+        """
+        Record a new queued job and return its id. resume_ids are the
+        resume index ids of the files, when their text is already indexed;
+        pdf_digests are the files' SHA-256 hashes, when computed on upload;
+        source_job_id is the job being re-screened, if any.
+        """
+        job_id = job_id or str(uuid.uuid4())
+        resume_ids = resume_ids or [None] * len(filenames)
+        now = time.time()
+        with connect(self.path) as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, user_id, status, stage, job_description, pdf_paths, filenames, "
+                "pdf_digests, source_job_id, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, user_id, QUEUED, 'saved', job_description, json.dumps(pdf_paths),
+                 json.dumps(filenames), json.dumps(pdf_digests) if pdf_digests else None, source_job_id, now, now)
+            )
+            conn.executemany(
+                "INSERT INTO job_resumes (job_id, resume_idx, filename, status, resume_id) "
+                "VALUES (?, ?, ?, 'pending', ?)",
+                [(job_id, idx, filename, resume_id)
+                 for idx, (filename, resume_id) in enumerate(zip(filenames, resume_ids))]
+            )
+        return job_id
+
+    def update(self, job_id, **fields):
+        """Update job columns"""
+        fields['updated_at'] = time.time()
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with connect(self.path) as conn:
+            conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+    def update_resume(self, job_id, resume_idx, status, score=None):
+        with connect(self.path) as conn:
+            conn.execute(
+                "UPDATE job_resumes SET status = ?, score = COALESCE(?, score) WHERE job_id = ? AND resume_idx = ?",
+                (status, score, job_id, resume_idx)
+            )
+            conn.execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (time.time(), job_id))
+
+    def record_result(self, job_id, result):
+        """Store a resume's analysis; every scored resume is kept, not just the top matches"""
+        with connect(self.path) as conn:
+            conn.execute(
+                "UPDATE job_resumes SET status = 'scored', score = ?, prerank_score = ?, strengths = ?, gaps = ? "
+                "WHERE job_id = ? AND resume_idx = ?",
+                (result['score'], result.get('prerank_score'), json.dumps(result.get('strengths', [])),
+                 json.dumps(result.get('gaps', [])), job_id, result['resume_idx'])
+            )
+            conn.execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (time.time(), job_id))
+
+    def record_skipped(self, job_id, resume_idx, prerank_score):
+        """Keep a resume pre-ranking left out, with its pre-rank score, among the results"""
+        with connect(self.path) as conn:
+            conn.execute(
+                "UPDATE job_resumes SET status = 'skipped', prerank_score = ? WHERE job_id = ? AND resume_idx = ?",
+                (prerank_score, job_id, resume_idx)
+            )
+            conn.execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (time.time(), job_id))
+
+    def set_duplicates(self, job_id, representatives, seen_as=None):
+        """
+        Record duplicate groups: representatives[idx] is the resume scored
+        for idx's group; seen_as maps a representative to the file name its
+        resume was indexed under by an earlier upload.
+        """
+        seen_as = seen_as or {}
+        with connect(self.path) as conn:
+            conn.executemany(
+                "UPDATE job_resumes SET duplicate_of = ?, seen_as = ? WHERE job_id = ? AND resume_idx = ?",
+                [(rep if rep != idx else None, seen_as.get(rep), job_id, idx)
+                 for idx, rep in enumerate(representatives)]
+            )
+
+    def results_page(self, job_id, sort='score', descending=True, min_score=None, max_score=None,
+                     page=1, per_page=20, hide_duplicates=False):
+        """
+        One page of a job's results, sorted and filtered in SQL: every
+        scored resume, and those pre-ranking kept from the LLM (llm_scored
+        false, no score; rows without the sort value come last, and score
+        filters leave them out). Each result names the resume it duplicates (duplicate_of)
+        or the files that duplicate it (duplicates). Returns (results, total
+        matching results).
+        """
+        column = RESULT_SORT_COLUMNS.get(sort, 'score')
+        direction = 'DESC' if descending else 'ASC'
+        where = "r.job_id = ? AND r.status IN ('scored', 'skipped')"
+        params = [job_id]
+        if min_score is not None:
+            where += " AND r.score >= ?"
+            params.append(min_score)
+        if max_score is not None:
+            where += " AND r.score <= ?"
+            params.append(max_score)
+        if hide_duplicates:
+            where += " AND r.duplicate_of IS NULL"
+        with connect(self.path) as conn:
+            total = conn.execute(f"SELECT COUNT(*) FROM job_resumes r WHERE {where}", params).fetchone()[0]
+            rows = conn.execute(
+                f"SELECT r.resume_idx, r.filename, r.status, r.score, r.prerank_score, r.strengths, r.gaps, r.seen_as, "
+                f"rep.filename AS duplicate_of, "
+                f"(SELECT GROUP_CONCAT(d.filename, '/') FROM job_resumes d "
+                f" WHERE d.job_id = r.job_id AND d.duplicate_of = r.resume_idx) AS duplicates "
+                f"FROM job_resumes r LEFT JOIN job_resumes rep "
+                f"ON rep.job_id = r.job_id AND rep.resume_idx = r.duplicate_of "
+                f"WHERE {where} ORDER BY r.{column} IS NULL, r.{column} {direction}, r.resume_idx ASC "
+                f"LIMIT ? OFFSET ?",
+                (*params, per_page, (page - 1) * per_page)
+            ).fetchall()
+        results = []
+        for row in rows:
+            result = dict(row)
+            result['llm_scored'] = result.pop('status') == 'scored'
+            result['strengths'] = json.loads(result['strengths'] or '[]')
+            result['gaps'] = json.loads(result['gaps'] or '[]')
+            # File names are secure_filename()d, so they never contain '/'
+            result['duplicates'] = result['duplicates'].split('/') if result['duplicates'] else []
+            results.append(result)
+        return results, total
+
+    def set_resume_ids(self, job_id, resume_ids):
+        with connect(self.path) as conn:
+            conn.executemany(
+                "UPDATE job_resumes SET resume_id = ? WHERE job_id = ? AND resume_idx = ?",
+                [(resume_id, job_id, idx) for idx, resume_id in enumerate(resume_ids)]
+            )
+
+    def get(self, job_id):
+        """Return the job as a dict (JSON columns decoded), or None"""
+        with connect(self.path) as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            resume_ids = conn.execute(
+                "SELECT resume_id FROM job_resumes WHERE job_id = ? ORDER BY resume_idx", (job_id,)
+            ).fetchall()
+        job = dict(row)
+        job['resume_ids'] = [resume_id[0] for resume_id in resume_ids]
+        for column in ('pdf_paths', 'filenames', 'pdf_digests'):
+            if job[column] is not None:
+                job[column] = json.loads(job[column])
+        return job
+
+    def claim(self, owner):
+        """
+        Take the oldest queued job for owner and mark it running; returns its
+        id, or None if nothing is queued. Safe to call from any number of
+        processes: a job is only ever claimed by one of them.
+        """
+        while True:
+            with connect(self.path) as conn:
+                row = conn.execute(
+                    "SELECT id FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1", (QUEUED,)
+                ).fetchone()
+                if row is None:
+                    return None
+                now = time.time()
+                claimed = conn.execute(
+                    "UPDATE jobs SET status = ?, owner = ?, heartbeat_at = ?, attempts = attempts + 1, "
+                    "updated_at = ? WHERE id = ? AND status = ?",
+                    (RUNNING, owner, now, now, row["id"], QUEUED)
+                ).rowcount
+            if claimed:
+                return row["id"]
+            # Another worker got there first; try the next one
+
+    def heartbeat(self, owner):
+        """Renew the lease on every job owner is running"""
+        with connect(self.path) as conn:
+            conn.execute("UPDATE jobs SET heartbeat_at = ? WHERE owner = ? AND status = ?",
+                         (time.time(), owner, RUNNING))
+
+    def recover_stale(self, lease_timeout, max_attempts):
+        """
+        Hand back running jobs whose owner stopped renewing its lease (the
+        process died or was restarted): they are queued again from the start,
+        or marked failed once they have been tried max_attempts times.
+        Returns (requeued, failed) job ids.
+        """
+        cutoff = time.time() - lease_timeout
+        requeued, failed = [], []
+        with connect(self.path) as conn:
+            rows = conn.execute(
+                "SELECT id, attempts FROM jobs WHERE status = ? AND COALESCE(heartbeat_at, updated_at) < ?",
+                (RUNNING, cutoff)
+            ).fetchall()
+            for row in rows:
+                now = time.time()
+                if row["attempts"] < max_attempts:
+                    changed = conn.execute(
+                        "UPDATE jobs SET status = ?, stage = 'saved', owner = NULL, heartbeat_at = NULL, "
+                        "updated_at = ? WHERE id = ? AND status = ? AND COALESCE(heartbeat_at, updated_at) < ?",
+                        (QUEUED, now, row["id"], RUNNING, cutoff)
+                    ).rowcount
+                    if changed:
+                        conn.execute(
+                            "UPDATE job_resumes SET status = 'pending', score = NULL, prerank_score = NULL, "
+                            "strengths = NULL, gaps = NULL WHERE job_id = ?", (row["id"],)
+                        )
+                        requeued.append(row["id"])
+                else:
+                    changed = conn.execute(
+                        "UPDATE jobs SET status = ?, error = ?, updated_at = ? "
+                        "WHERE id = ? AND status = ? AND COALESCE(heartbeat_at, updated_at) < ?",
+                        (FAILED, f"Worker stopped while running the job ({row['attempts']} attempts)", now,
+                         row["id"], RUNNING, cutoff)
+                    ).rowcount
+                    if changed:
+                        failed.append(row["id"])
+        return requeued, failed
+
+    def latest_job_id(self, user_id):
+        """Id of the user's most recently created job, or None"""
+        with connect(self.path) as conn:
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE user_id = ? ORDER BY created_at DESC LIMIT 1", (user_id,)
+            ).fetchone()
+        return row["id"] if row else None
+
+    def progress(self, job_id):
+        """Status snapshot for the status endpoint and event stream"""
+        with connect(self.path) as conn:
+            job = conn.execute(
+                "SELECT id, status, stage, error, updated_at FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+            if job is None:
+                return None
+            resumes = conn.execute(
+                "SELECT resume_idx, filename, status, score FROM job_resumes WHERE job_id = ? ORDER BY resume_idx",
+                (job_id,)
+            ).fetchall()
+        resumes = [dict(resume) for resume in resumes]
+        return {
+            "job_id": job["id"],
+            "status": job["status"],
+            "stage": job["stage"],
+            "error": job["error"],
+            "updated_at": job["updated_at"],
+            "total": len(resumes),
+            "extracted": sum(1 for r in resumes if r["status"] in ('extracted', 'scored', 'skipped')),
+            "scored": sum(1 for r in resumes if r["status"] == 'scored'),
+            "skipped": sum(1 for r in resumes if r["status"] == 'skipped'),
+            "resumes": resumes
+        }
+
+
+class JobQueue:
+    """
+    Runs queued jobs from a JobStore on local worker threads. Workers claim
+    jobs from the shared store, so a job queued by any process is run by
+    whichever one is free, and renew a lease on them while they run; a job
+    whose owner dies is queued again (or failed, after max_attempts) once
+    its lease is lease_timeout seconds old.
+    """
+
+    def __init__(self, store, handler, workers=2, poll_interval=1.0, lease_timeout=120, max_attempts=3):
+        self.store = store
+        self.handler = handler
+        self.poll_interval = poll_interval
+        self.lease_timeout = lease_timeout
+        self.max_attempts = max_attempts
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.wake = threading.Event()
+        self.recover()
+        for n in range(workers):
+            threading.Thread(target=self._work, name=f'screening-job-{n}', daemon=True).start()
+        threading.Thread(target=self._renew, name='screening-job-lease', daemon=True).start()
+
+    def submit(self, job_id):
+        """Wake a worker for a job just queued in the store"""
+        self.wake.set()
+
+    def recover(self):
+        requeued, failed = self.store.recover_stale(self.lease_timeout, self.max_attempts)
+        for job_id in requeued:
+            print(f"Screening job {job_id} lost its worker; queued again")
+        for job_id in failed:
+            print(f"Screening job {job_id} lost its worker too many times; marked failed")
+            metrics.inc("errors_total", stage="job")
+        if requeued:
+            self.wake.set()
+
+    def _work(self):
+        while True:
+            # Cleared before claiming, so a job submitted meanwhile wakes the wait below
+            self.wake.clear()
+            try:
+                job_id = self.store.claim(self.owner)
+            except Exception as e:
+                print(f"Claiming a screening job failed: {str(e)}")
+                job_id = None
+            if job_id is None:
+                self.wake.wait(self.poll_interval)
+            else:
+                self._run(job_id)
+
+    def _renew(self):
+        # Renew well within the lease, and look for other workers' abandoned jobs
+        while True:
+            time.sleep(self.lease_timeout / 4)
+            try:
+                self.store.heartbeat(self.owner)
+                self.recover()
+            except Exception as e:
+                print(f"Renewing screening job leases failed: {str(e)}")
+
+    def _run(self, job_id):
+        try:
+            self.handler(job_id)
+        except Exception as e:
+            print(f"Screening job {job_id} failed: {str(e)}")
+            metrics.inc("errors_total", stage="job")
+            self.store.update(job_id, status=FAILED, error=str(e))
+
+
+def event_stream(store, job_id, poll_interval=0.5, heartbeat=15.0):
+    """Yield Server-Sent Events with the job's progress until it finishes"""
+    last_update = None
+    last_sent = time.monotonic()
+    while True:
+        progress = store.progress(job_id)
+        if progress is None:
+            yield "event: error\ndata: {\"error\": \"Job not found\"}\n\n"
+            return
+        if progress["updated_at"] != last_update:
+            last_update = progress["updated_at"]
+            last_sent = time.monotonic()
+            yield f"data: {json.dumps(progress)}\n\n"
+            if progress["status"] in TERMINAL_STATUSES:
+                return
+        elif time.monotonic() - last_sent >= heartbeat:
+            # Comment line keeps proxies from closing an idle connection
+            last_sent = time.monotonic()
+            yield ": keep-alive\n\n"
+        time.sleep(poll_interval)
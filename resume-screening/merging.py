@@ -0,0 +1,200 @@
+# merging.py - On-demand merged PDFs, a bounded merged-PDF cache and upload retention
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+
+from PyPDF2 import PdfMerger
+
+from metrics import metrics
+
+
+def write_merged_pdf(pdf_files, output):
+    """Merge pdf_files into output (a path or a binary file object with write/tell)"""
+    with metrics.timer('merge'):
+        merger = PdfMerger()
+        for pdf in pdf_files:
+            merger.append(pdf)
+        merger.write(output)
+        merger.close()
+
+
+class MergeCancelled(Exception):
+    pass
+
+
+class _TeeWriter:
+    """File-like sink that writes to the cache file and hands each chunk to the response"""
+
+    def __init__(self, file, chunks, cancelled):
+        self.file = file
+        self.chunks = chunks
+        self.cancelled = cancelled
+
+    def put(self, item):
+        """Queue item for the response, giving up if the client has gone away"""
+        while True:
+            if self.cancelled.is_set():
+                raise MergeCancelled()
+            try:
+                self.chunks.put(item, timeout=1)
+                return
+            except queue.Full:
+                pass
+
+    def write(self, data):
+        self.file.write(data)
+        self.put(bytes(data))
+        return len(data)
+
+    def tell(self):
+        return self.file.tell()
+
+
+class MergedPdfCache:
+    """
+    Merged PDFs built on first download and kept in folder as
+    merged_<job_id>.pdf. Files unused for longer than max_age seconds are
+    removed, then the least recently used ones until the folder fits in
+    max_bytes. A limit of 0 disables that kind of eviction.
+    """
+
+    def __init__(self, folder, max_bytes=500 * 1024 * 1024, max_age=7 * 24 * 3600):
+        # Absolute, as send_file resolves relative paths against the app's root, not the working directory
+        self.folder = os.path.abspath(folder)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        os.makedirs(folder, exist_ok=True)
+
+    def path(self, job_id):
+        return os.path.join(self.folder, f"merged_{job_id}.pdf")
+
+    def get(self, job_id):
+        """Path of the cached merged PDF (marking it recently used), or None"""
+        path = self.path(job_id)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def stream(self, job_id, pdf_paths, chunk_queue_size=16):
+        """
+        Merge pdf_paths on a background thread, yielding the PDF bytes as
+        they are written while also saving them to the cache.
+        """
+        chunks = queue.Queue(maxsize=chunk_queue_size)
+        cancelled = threading.Event()
+        done = object()
+        fd, tmp_path = tempfile.mkstemp(dir=self.folder, suffix='.tmp')
+
+        writer = _TeeWriter(None, chunks, cancelled)
+
+        def produce():
+            try:
+                with os.fdopen(fd, 'wb') as file:
+                    writer.file = file
+                    write_merged_pdf(pdf_paths, writer)
+                os.replace(tmp_path, self.path(job_id))
+                writer.put(done)
+                self.evict()
+            except MergeCancelled:
+                _remove(tmp_path)
+            except Exception as e:
+                _remove(tmp_path)
+                print(f"Error merging PDFs for {job_id}: {str(e)}")
+                try:
+                    writer.put(e)
+                except MergeCancelled:
+                    pass
+
+        threading.Thread(target=produce, name=f'merge-{job_id}', daemon=True).start()
+        try:
+            while True:
+                chunk = chunks.get()
+                if chunk is done:
+                    return
+                if isinstance(chunk, Exception):
+                    raise chunk
+                yield chunk
+        finally:
+            # Client went away (or we finished): let the producer stop
+            cancelled.set()
+
+    def evict(self):
+        """Apply the age limit, then the size cap, least recently used first"""
+        now = time.time()
+        entries = []
+        for name in os.listdir(self.folder):
+            path = os.path.join(self.folder, name)
+            if name.endswith('.tmp'):
+                # Left behind by a merge that died mid-write
+                try:
+                    if now - os.path.getmtime(path) > 3600:
+                        _remove(path)
+                except FileNotFoundError:
+                    pass
+                continue
+            if not (name.startswith('merged_') and name.endswith('.pdf')):
+                continue
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if self.max_age and now - stat.st_mtime > self.max_age:
+                _remove(path)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        if self.max_bytes:
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                _remove(path)
+                total -= size
+
+
+def _remove(path):
+    try:
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def sweep_uploads(upload_folder, max_age):
+    """Remove upload session folders not modified for max_age seconds"""
+    now = time.time()
+    removed = 0
+    for name in os.listdir(upload_folder):
+        path = os.path.join(upload_folder, name)
+        try:
+            if os.path.isdir(path) and now - os.path.getmtime(path) > max_age:
+                _remove(path)
+                removed += 1
+        except FileNotFoundError:
+            continue
+    return removed
+
+
+def start_sweeper(upload_folder, upload_max_age, merged_cache, interval=3600):
+    """Periodically expire upload sessions and merged PDFs on a daemon thread"""
+    def run():
+        while True:
+            try:
+                removed = sweep_uploads(upload_folder, upload_max_age) if upload_max_age else 0
+                merged_cache.evict()
+                if removed:
+                    print(f"Retention sweep removed {removed} expired upload sessions")
+            except Exception as e:
+                print(f"Retention sweep failed: {str(e)}")
+            time.sleep(interval)
+
+    thread = threading.Thread(target=run, name='retention-sweeper', daemon=True)
+    thread.start()
+    return thread
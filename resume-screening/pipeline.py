@@ -0,0 +1,162 @@
+# pipeline.py - Text extraction and scoring setup shared by the web app and batch_screen.py
+#
+# Importing this module has no side effects: nothing is created, started or
+# printed until one of the create_* functions is called.
+import os
+
+from analysis_cache import AnalysisCache
+from extraction import TextCache, TextExtractor
+from heuristic import HeuristicScorer
+from metrics import metrics
+from prerank import prerank_scores, shortlist
+from scoring import RESUME_CHAR_LIMIT, OpenAIBackend, OpenAICompatibleBackend, ScoringEngine
+
+
+def load_config(environ=os.environ):
+    """Extraction and scoring settings, read from the environment"""
+    return {
+        # LLM scoring settings (a budget of 0 means unlimited)
+        # Scoring backend, chosen once at startup: 'openai', 'local' (any OpenAI-compatible
+        # server at LOCAL_LLM_BASE_URL, e.g. Ollama) or 'heuristic' (keyword scorer, no network)
+        'SCORING_BACKEND': environ.get('SCORING_BACKEND', 'openai').lower(),
+        'LOCAL_LLM_BASE_URL': environ.get('LOCAL_LLM_BASE_URL', 'http://localhost:11434/v1'),
+        'LOCAL_LLM_MODEL': environ.get('LOCAL_LLM_MODEL', 'llama3.1'),
+        'LOCAL_LLM_API_KEY': environ.get('LOCAL_LLM_API_KEY'),
+        'OPENAI_MODEL': environ.get('OPENAI_MODEL', 'gpt-3.5-turbo'),
+        'OPENAI_BASE_URL': environ.get('OPENAI_BASE_URL') or None,
+        'SCORING_CONCURRENCY': int(environ.get('SCORING_CONCURRENCY', 8)),
+        'SCORING_REQUESTS_PER_MINUTE': int(environ.get('SCORING_REQUESTS_PER_MINUTE', 0)),
+        'SCORING_TOKENS_PER_MINUTE': int(environ.get('SCORING_TOKENS_PER_MINUTE', 0)),
+        'SCORING_MAX_RETRIES': int(environ.get('SCORING_MAX_RETRIES', 3)),
+        # Score up to SCORING_BATCH_SIZE resumes per request, sharing one copy of the job
+        # description, within SCORING_BATCH_TOKEN_BUDGET prompt tokens (0 or 1: one resume per request)
+        'SCORING_BATCH_SIZE': int(environ.get('SCORING_BATCH_SIZE', 0)),
+        'SCORING_BATCH_TOKEN_BUDGET': int(environ.get('SCORING_BATCH_TOKEN_BUDGET', 6000)),
+
+        # Persistent cache of LLM analyses (set ANALYSIS_CACHE_PATH to an empty string to disable)
+        'ANALYSIS_CACHE_PATH': environ.get('ANALYSIS_CACHE_PATH', os.path.join('cache', 'analyses.sqlite3')),
+        'ANALYSIS_CACHE_MAX_ENTRIES': int(environ.get('ANALYSIS_CACHE_MAX_ENTRIES', 10000)),
+        'ANALYSIS_CACHE_MAX_AGE_DAYS': float(environ.get('ANALYSIS_CACHE_MAX_AGE_DAYS', 30)),
+
+        # PDF text extraction: worker processes (0 = one per core) and content-hash keyed text cache
+        'EXTRACTION_WORKERS': int(environ.get('EXTRACTION_WORKERS', 0)),
+        'TEXT_CACHE_FOLDER': environ.get('TEXT_CACHE_FOLDER', os.path.join('cache', 'text')),
+
+        # Stop parsing a PDF after this many pages, or once this many characters are
+        # collected (0 = no limit); the scorer only reads RESUME_CHAR_LIMIT of them
+        'EXTRACTION_MAX_PAGES': int(environ.get('EXTRACTION_MAX_PAGES', 10)),
+        'EXTRACTION_MAX_CHARS': int(environ.get('EXTRACTION_MAX_CHARS', 3 * RESUME_CHAR_LIMIT)),
+
+        # Trim long resumes to the prompt budget section by section (experience,
+        # skills, education, ...) instead of keeping only their first characters
+        'SECTION_AWARE_TRUNCATION': environ.get('SECTION_AWARE_TRUNCATION', '1') == '1',
+
+        # Local TF-IDF pre-ranking: only the top K resumes are sent to the LLM (0 disables pre-ranking)
+        'PRERANK_TOP_K': int(environ.get('PRERANK_TOP_K', 50)),
+    }
+
+
+def create_text_extractor(config):
+    return TextExtractor(
+        cache=TextCache(config['TEXT_CACHE_FOLDER']) if config['TEXT_CACHE_FOLDER'] else None,
+        max_workers=config['EXTRACTION_WORKERS'],
+        max_pages=config['EXTRACTION_MAX_PAGES'],
+        max_chars=config['EXTRACTION_MAX_CHARS']
+    )
+
+
+def create_analysis_cache(config):
+    """The persistent analysis cache, or None if ANALYSIS_CACHE_PATH is empty"""
+    if not config['ANALYSIS_CACHE_PATH']:
+        return None
+    return AnalysisCache(
+        config['ANALYSIS_CACHE_PATH'],
+        max_entries=config['ANALYSIS_CACHE_MAX_ENTRIES'],
+        max_age=config['ANALYSIS_CACHE_MAX_AGE_DAYS'] * 24 * 3600
+    )
+
+
+def create_scorer(config, api_key=None, cache=None):
+    """Build the configured scoring backend; None if it cannot be used (e.g. no OpenAI API key)"""
+    backend_name = config['SCORING_BACKEND']
+    if backend_name == 'heuristic':
+        return HeuristicScorer()
+    if backend_name == 'local':
+        backend = OpenAICompatibleBackend(
+            config['LOCAL_LLM_BASE_URL'],
+            config['LOCAL_LLM_MODEL'],
+            api_key=config['LOCAL_LLM_API_KEY']
+        )
+    elif backend_name == 'openai':
+        if not api_key:
+            print("Error: OpenAI API key not found")
+            return None
+        backend = OpenAIBackend(api_key, model=config['OPENAI_MODEL'], base_url=config['OPENAI_BASE_URL'])
+    else:
+        raise ValueError(f"Unknown SCORING_BACKEND {backend_name!r}; use openai, local or heuristic")
+    return ScoringEngine(
+        backend,
+        concurrency=config['SCORING_CONCURRENCY'],
+        requests_per_minute=config['SCORING_REQUESTS_PER_MINUTE'],
+        tokens_per_minute=config['SCORING_TOKENS_PER_MINUTE'],
+        max_retries=config['SCORING_MAX_RETRIES'],
+        cache=cache,
+        batch_size=config['SCORING_BATCH_SIZE'],
+        batch_token_budget=config['SCORING_BATCH_TOKEN_BUDGET'],
+        section_aware=config['SECTION_AWARE_TRUNCATION']
+    )
+
+
+def score_resumes(scorer, resumes_text, job_description, on_result=None, limit=None, prerank_top_k=0,
+                  on_skipped=None):
+    """
+    Analyze resumes against a job description to find the best matches
+    using scorer (see create_scorer)
+    Results are sorted best first; pass limit to keep only the top matches
+    on_result, if given, is called with each resume's result as soon as it is scored
+
+    With prerank_top_k set, resumes are first ranked locally by TF-IDF
+    similarity to the job description and only the top K are scored by the
+    LLM; each result carries its pre-rank score (0-100) as prerank_score.
+    on_skipped, if given, is called with {"resume_idx", "prerank_score"} for
+    each resume pre-ranking leaves out; those get no result.
+    """
+    try:
+        if scorer is None:
+            return [{"resume_idx": i, "score": 0, "strengths": ["API error: Missing API key"],
+                     "gaps": ["Contact administrator"]} for i in range(len(resumes_text))]
+
+        # Shortlist locally so LLM calls are only spent on plausible matches
+        indices = None
+        prerank = None
+        if prerank_top_k:
+            with metrics.timer('prerank'):
+                prerank = prerank_scores(resumes_text, job_description)
+            if len(resumes_text) > prerank_top_k:
+                indices = sorted(shortlist(prerank, prerank_top_k))
+                print(f"Pre-ranking shortlisted {len(indices)} of {len(resumes_text)} resumes")
+                if on_skipped is not None:
+                    shortlisted = set(indices)
+                    for i in range(len(resumes_text)):
+                        if i not in shortlisted:
+                            on_skipped({"resume_idx": i, "prerank_score": round(float(prerank[i]) * 100, 1)})
+
+        def record(result):
+            if prerank is not None:
+                result["prerank_score"] = round(float(prerank[result["resume_idx"]]) * 100, 1)
+            if on_result is not None:
+                on_result(result)
+
+        # Score resumes concurrently; results come back in resume_idx order
+        results = scorer.score_all(
+            resumes_text, job_description, on_result=record, indices=indices
+        )
+
+        # Sort by score descending (stable, so ties keep upload order)
+        results.sort(key=lambda x: x["score"], reverse=True)
+        return results[:limit] if limit else results
+
+    except Exception as e:
+        print(f"Critical error in score_resumes: {str(e)}")
+        return [{"resume_idx": i, "score": 0, "strengths": ["System error"],
+                 "gaps": ["Contact administrator"]} for i in range(len(resumes_text))]
@@ -0,0 +1,74 @@
+# prerank.py - Local TF-IDF pre-ranking of resumes against a job description
+import re
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9+#]+)*")
+
+# Very common words carry no signal for matching
+STOP_WORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or our that the their this to was
+we were will with you your i me my he she they them not but if so than then there these those
+""".split())
+
+
+def tokenize(text):
+    return [token for token in TOKEN_PATTERN.findall((text or '').lower()) if token not in STOP_WORDS]
+
+
+def prerank_scores(resumes_text, job_description):
+    """
+    Cosine similarity between the job description and every resume using
+    TF-IDF weights fitted on the batch. Term counts are kept as sparse
+    (doc, term, count) arrays, so the similarity of the whole batch is a
+    single sparse matrix-vector product. Returns an array of floats in [0, 1].
+    """
+    n_docs = len(resumes_text)
+    if n_docs == 0:
+        return np.zeros(0)
+
+    vocab = {}
+    doc_ids, term_ids = [], []
+    for doc, text in enumerate(resumes_text):
+        ids = [vocab.setdefault(token, len(vocab)) for token in tokenize(text)]
+        term_ids.extend(ids)
+        doc_ids.extend([doc] * len(ids))
+    n_terms = max(len(vocab), 1)
+
+    # Collapse (doc, term) occurrences into counts
+    keys = np.asarray(doc_ids, dtype=np.int64) * n_terms + np.asarray(term_ids, dtype=np.int64)
+    keys, counts = np.unique(keys, return_counts=True)
+    docs, terms = np.divmod(keys, n_terms)
+
+    # Smoothed inverse document frequency and sublinear term frequency
+    doc_freq = np.bincount(terms, minlength=n_terms)
+    idf = np.log((1 + n_docs) / (1 + doc_freq)) + 1
+    weights = (1 + np.log(counts)) * idf[terms]
+    doc_norms = np.sqrt(np.bincount(docs, weights=weights ** 2, minlength=n_docs))
+
+    # Job description vector; terms no resume contains only add to its norm
+    query = np.zeros(n_terms)
+    unseen_idf = np.log(1 + n_docs) + 1
+    query_norm_sq = 0.0
+    jd_tokens, jd_counts = np.unique(tokenize(job_description), return_counts=True)
+    for token, count in zip(jd_tokens, jd_counts):
+        term = vocab.get(token)
+        weight = (1 + np.log(count)) * (idf[term] if term is not None else unseen_idf)
+        if term is not None:
+            query[term] = weight
+        query_norm_sq += weight ** 2
+    if query_norm_sq == 0:
+        return np.zeros(n_docs)
+
+    dots = np.bincount(docs, weights=weights * query[terms], minlength=n_docs)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        similarity = dots / (doc_norms * np.sqrt(query_norm_sq))
+    return np.nan_to_num(similarity, nan=0.0, posinf=0.0)
+
+
+def shortlist(scores, top_k):
+    """Indices of the top_k highest scores (ties keep upload order), or all if top_k is 0"""
+    order = np.argsort(-scores, kind='stable')
+    if top_k:
+        order = order[:top_k]
+    return [int(idx) for idx in order]
@@ -0,0 +1,147 @@
+# resume_index.py - Persistent full-text index of every screened resume
+import hashlib
+import time
+
+from db import add_missing_columns, connect, open_store
+from dedup import bands, from_signed, hamming, to_signed
+from prerank import tokenize
+
+
+def text_digest(text):
+    return hashlib.sha256(text.encode('utf-8', errors='replace')).hexdigest()
+
+
+class ResumeIndex:
+    """
+    Extracted resume text from every upload session, searchable through a
+    SQLite FTS5 table ranked with BM25. Resumes are deduplicated by the hash
+    of their text, so re-uploading the same resume does not grow the index.
+    SimHash fingerprints, with their bands indexed, find near duplicates.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        open_store(path)
+        with connect(path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS resumes (
+                    id INTEGER PRIMARY KEY,
+                    digest TEXT NOT NULL UNIQUE,
+                    filename TEXT NOT NULL,
+                    pdf_path TEXT NOT NULL,
+                    session_id TEXT,
+                    body TEXT NOT NULL,
+                    added_at REAL NOT NULL,
+                    fingerprint INTEGER
+                )
+            """)
+            # Resumes indexed before fingerprints existed are never matched as near duplicates
+            add_missing_columns(conn, 'resumes', {'fingerprint': 'INTEGER'})
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS resume_bands (
+                    band INTEGER NOT NULL,
+                    value INTEGER NOT NULL,
+                    resume_id INTEGER NOT NULL,
+                    PRIMARY KEY (band, value, resume_id)
+                )
+            """)
+            conn.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS resumes_fts USING fts5(
+                    body, content='resumes', content_rowid='id', tokenize='porter unicode61'
+                )
+            """)
+
+    def add_many(self, entries, session_id=None, fingerprints=None):
+        """
+        Index (text, filename, pdf_path) entries and return their ids, in
+        order. Text already in the index keeps its existing id; entries whose
+        text is None are skipped and get None. fingerprints, if given, are
+        the entries' SimHashes.
+        """
+        ids = []
+        now = time.time()
+        fingerprints = fingerprints or [None] * len(entries)
+        with connect(self.path) as conn:
+            for (text, filename, pdf_path), fingerprint in zip(entries, fingerprints):
+                if text is None:
+                    ids.append(None)
+                    continue
+                digest = text_digest(text)
+                row = conn.execute("SELECT id, fingerprint FROM resumes WHERE digest = ?", (digest,)).fetchone()
+                if row is not None:
+                    # Point at the newest upload of this resume
+                    conn.execute(
+                        "UPDATE resumes SET filename = ?, pdf_path = ?, session_id = ? WHERE id = ?",
+                        (filename, pdf_path, session_id, row["id"])
+                    )
+                    if row["fingerprint"] is None and fingerprint is not None:
+                        self._set_fingerprint(conn, row["id"], fingerprint)
+                    ids.append(row["id"])
+                    continue
+                cursor = conn.execute(
+                    "INSERT INTO resumes (digest, filename, pdf_path, session_id, body, added_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (digest, filename, pdf_path, session_id, text, now)
+                )
+                conn.execute("INSERT INTO resumes_fts (rowid, body) VALUES (?, ?)", (cursor.lastrowid, text))
+                if fingerprint is not None:
+                    self._set_fingerprint(conn, cursor.lastrowid, fingerprint)
+                ids.append(cursor.lastrowid)
+        return ids
+
+    @staticmethod
+    def _set_fingerprint(conn, resume_id, fingerprint):
+        conn.execute("UPDATE resumes SET fingerprint = ? WHERE id = ?", (to_signed(fingerprint), resume_id))
+        conn.executemany(
+            "INSERT OR IGNORE INTO resume_bands (band, value, resume_id) VALUES (?, ?, ?)",
+            [(band, value, resume_id) for band, value in bands(fingerprint)]
+        )
+
+    def find_near_duplicate(self, fingerprint, max_distance, exclude_ids=()):
+        """The closest indexed resume within max_distance bits of fingerprint, as a dict, or None"""
+        clauses = " OR ".join("(b.band = ? AND b.value = ?)" for _ in range(len(bands(fingerprint))))
+        params = [item for pair in bands(fingerprint) for item in pair]
+        with connect(self.path) as conn:
+            rows = conn.execute(
+                f"SELECT DISTINCT r.id, r.filename, r.pdf_path, r.session_id, r.body, r.fingerprint "
+                f"FROM resume_bands b JOIN resumes r ON r.id = b.resume_id WHERE {clauses}",
+                params
+            ).fetchall()
+        best = None
+        for row in rows:
+            if row["id"] in exclude_ids:
+                continue
+            distance = hamming(fingerprint, from_signed(row["fingerprint"]))
+            if distance <= max_distance and (best is None or distance < best[0]):
+                best = (distance, row)
+        return dict(best[1]) if best else None
+
+    def get_many(self, resume_ids):
+        """Return the indexed resumes as dicts, in the order of resume_ids"""
+        if not resume_ids:
+            return []
+        with connect(self.path) as conn:
+            placeholders = ", ".join("?" for _ in resume_ids)
+            rows = conn.execute(
+                f"SELECT id, filename, pdf_path, session_id, body FROM resumes WHERE id IN ({placeholders})",
+                list(resume_ids)
+            ).fetchall()
+        by_id = {row["id"]: dict(row) for row in rows}
+        return [by_id.get(resume_id) for resume_id in resume_ids]
+
+    def search(self, job_description, limit=100):
+        """Ids of the indexed resumes that best match the job description, best first"""
+        terms = sorted(set(tokenize(job_description)))
+        if not terms:
+            return []
+        query = " OR ".join('"{}"'.format(term.replace('"', '""')) for term in terms)
+        with connect(self.path) as conn:
+            rows = conn.execute(
+                "SELECT rowid FROM resumes_fts WHERE resumes_fts MATCH ? ORDER BY bm25(resumes_fts) LIMIT ?",
+                (query, limit)
+            ).fetchall()
+        return [row["rowid"] for row in rows]
+
+    def count(self):
+        with connect(self.path) as conn:
+            return conn.execute("SELECT COUNT(*) FROM resumes").fetchone()[0]
@@ -0,0 +1,516 @@
+# scoring.py - Concurrent, rate-limited LLM scoring for resume screening
+import json
+import random
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import openai
+
+from analysis_cache import cache_key
+from metrics import metrics, propagate_trace
+from sections import fit_sections
+
+try:
+    from openai import OpenAI
+except ImportError:
+    # openai < 1.0 only ships the module-level ChatCompletion API
+    OpenAI = None
+
+SYSTEM_PROMPT = "You analyze resumes and provide structured feedback as valid JSON."
+
+# Bump whenever SYSTEM_PROMPT or build_prompt changes so cached analyses are not reused
+PROMPT_VERSION = 1
+
+# Rough completion size used when reserving token budget for a request
+COMPLETION_TOKENS_ESTIMATE = 300
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+# Characters of each resume sent to the LLM
+RESUME_CHAR_LIMIT = 4000
+
+
+def build_prompt(resume_text, job_description):
+    """Build the scoring prompt for a single resume"""
+    return f"""
+                You are an HR assistant analyzing resumes for job fit.
+
+                JOB DESCRIPTION:
+                {job_description}
+
+                RESUME:
+                {resume_text[:RESUME_CHAR_LIMIT]}  # Truncate if too long
+
+                Based on the job description and resume, provide:
+                1. A matching score from 0-100
+                2. Top 3 reasons this candidate might be a good fit
+                3. Top 3 potential gaps in experience or skills
+                Format your response as JSON with keys: "score", "strengths", "gaps"
+                """
+
+
+def build_batch_prompt(entries, job_description):
+    """Build one prompt scoring several (label, resume_text) entries against the job description"""
+    resumes = "\n\n".join(f"RESUME {label}:\n{text[:RESUME_CHAR_LIMIT]}" for label, text in entries)
+    return f"""
+                You are an HR assistant analyzing resumes for job fit.
+
+                JOB DESCRIPTION:
+                {job_description}
+
+                Below are {len(entries)} resumes, each introduced by a line "RESUME <id>:".
+
+                {resumes}
+
+                For each resume, based on the job description, provide:
+                1. A matching score from 0-100
+                2. Top 3 reasons this candidate might be a good fit
+                3. Top 3 potential gaps in experience or skills
+                Format your response as JSON with a key "results" holding an array with one
+                object per resume, each with keys: "id", "score", "strengths", "gaps"
+                """
+
+
+def parse_score(value):
+    """A reply's score as a number from 0 to 100 ("85/100" reads as 85), or None if it has none"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        score = float(value)
+    else:
+        match = re.match(r"\s*(-?\d+(?:\.\d+)?)", str(value)) if value is not None else None
+        if match is None:
+            return None
+        score = float(match.group(1))
+    if score != score:
+        return None
+    score = min(max(score, 0.0), 100.0)
+    return int(score) if score.is_integer() else score
+
+
+def as_list(value):
+    """Strengths or gaps as a list of strings; a lone string is one item, not its characters"""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, dict):
+        return [str(item) for item in value.values() if item is not None]
+    try:
+        return [str(item) for item in value if item is not None]
+    except TypeError:
+        return [str(value)]
+
+
+def normalize_analysis(analysis):
+    """
+    {"score", "strengths", "gaps"} from an LLM's analysis object, whatever
+    shapes it used: the score a number (0 if unusable), the others lists of
+    strings. Every analysis is normalized before it is cached or returned.
+    """
+    if not isinstance(analysis, dict):
+        analysis = {}
+    score = parse_score(analysis.get("score"))
+    return {
+        "score": 0 if score is None else score,
+        "strengths": as_list(analysis.get("strengths")),
+        "gaps": as_list(analysis.get("gaps"))
+    }
+
+
+def parse_batch_reply(reply, labels):
+    """
+    Map each label to its {"score", "strengths", "gaps"} from a batch reply.
+    Labels missing from the reply, or with an unusable entry, are left out.
+    """
+    items = json.loads(reply)
+    if isinstance(items, dict):
+        items = items.get("results")
+    if not isinstance(items, list):
+        raise ValueError("Batch reply has no results array")
+    parsed = {}
+    for item in items:
+        if not isinstance(item, dict) or str(item.get("id")) not in labels:
+            continue
+        if parse_score(item.get("score")) is None:
+            continue
+        parsed[str(item["id"])] = normalize_analysis(item)
+    return parsed
+
+
+def estimate_tokens(text):
+    """Cheap token estimate (~4 characters per token) for budget accounting"""
+    return len(text) // 4 + 1
+
+
+def error_result(idx, strengths, gaps):
+    return {"resume_idx": idx, "score": 0, "strengths": strengths, "gaps": gaps}
+
+
+class RateLimiter:
+    """
+    Sliding one-minute window over request and token budgets.
+    A budget of 0 means unlimited.
+    """
+
+    def __init__(self, requests_per_minute=0, tokens_per_minute=0, window=60.0):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.window = window
+        self._events = deque()  # (timestamp, tokens)
+        self._tokens_in_window = 0
+        self._lock = threading.Lock()
+
+    def _expire(self, now):
+        while self._events and now - self._events[0][0] >= self.window:
+            _, tokens = self._events.popleft()
+            self._tokens_in_window -= tokens
+
+    def _wait_time(self, now, tokens):
+        """Seconds until a request of `tokens` fits in both budgets, 0 if it fits now"""
+        wait = 0.0
+        if self.requests_per_minute and len(self._events) >= self.requests_per_minute:
+            oldest = self._events[len(self._events) - self.requests_per_minute][0]
+            wait = max(wait, oldest + self.window - now)
+        if self.tokens_per_minute and self._events:
+            # A single request larger than the whole budget is let through once the window is empty
+            excess = self._tokens_in_window + tokens - self.tokens_per_minute
+            for timestamp, event_tokens in self._events:
+                if excess <= 0:
+                    break
+                excess -= event_tokens
+                wait = max(wait, timestamp + self.window - now)
+        return wait
+
+    def acquire(self, tokens=0):
+        """Block until the request fits in the budgets, then record it"""
+        if not self.requests_per_minute and not self.tokens_per_minute:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._expire(now)
+                wait = self._wait_time(now, tokens)
+                if wait <= 0:
+                    self._events.append((now, tokens))
+                    self._tokens_in_window += tokens
+                    return
+            time.sleep(wait)
+
+
+class OpenAIBackend:
+    """
+    Chat completions from the OpenAI API through one shared client (and
+    connection pool). The client library is probed once, at import.
+    """
+
+    name = "openai"
+
+    def __init__(self, api_key, model="gpt-3.5-turbo", base_url=None, timeout=60.0):
+        self.model = model
+        if OpenAI is not None:
+            # Retries are handled by the engine so they share the rate limiter
+            self.client = OpenAI(api_key=api_key, base_url=base_url, max_retries=0, timeout=timeout)
+        else:
+            print("Using older OpenAI client")
+            self.client = None
+            openai.api_key = api_key
+            if base_url:
+                openai.api_base = base_url
+
+    def complete(self, messages, max_tokens=None, json_mode=True):
+        """Return the reply text for messages"""
+        options = {"model": self.model, "messages": messages}
+        if json_mode:
+            options["response_format"] = {"type": "json_object"}
+        if max_tokens:
+            options["max_tokens"] = max_tokens
+        if self.client is not None:
+            response = self.client.chat.completions.create(**options)
+        else:
+            response = openai.ChatCompletion.create(**options)
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            metrics.inc("llm_tokens_total", getattr(usage, "prompt_tokens", 0) or 0, type="prompt")
+            metrics.inc("llm_tokens_total", getattr(usage, "completion_tokens", 0) or 0, type="completion")
+        return response.choices[0].message.content
+
+
+class OpenAICompatibleBackend(OpenAIBackend):
+    """
+    Any server speaking the OpenAI chat completions protocol, such as a local
+    Ollama, vLLM or llama.cpp server. Such servers usually ignore the API key.
+    """
+
+    name = "local"
+
+    def __init__(self, base_url, model, api_key=None, timeout=120.0):
+        super().__init__(api_key or "local", model=model, base_url=base_url, timeout=timeout)
+
+
+class ScoringEngine:
+    """
+    Scores resumes against a job description through an LLM backend, with a
+    bounded number of requests in flight; 429/5xx responses are retried with
+    exponential backoff.
+    """
+
+    def __init__(self, backend, concurrency=8, requests_per_minute=0, tokens_per_minute=0, max_retries=3,
+                 backoff_base=1.0, backoff_max=30.0, cache=None, batch_size=0, batch_token_budget=6000,
+                 section_aware=False):
+        self.backend = backend
+        self.name = backend.name
+        self.cache = cache
+        # Up to batch_size resumes share a request, within batch_token_budget prompt tokens (0 or 1: no batching)
+        self.batch_size = batch_size
+        self.batch_token_budget = batch_token_budget
+        # Long resumes are cut section by section rather than to their first RESUME_CHAR_LIMIT characters;
+        # that changes the prompt, so its analyses are cached under their own prompt version
+        self.section_aware = section_aware
+        self.prompt_version = f"{PROMPT_VERSION}-sections" if section_aware else PROMPT_VERSION
+        self.model = backend.model
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+
+    def ping(self):
+        """Send a tiny request to check the backend is reachable; returns its reply"""
+        return self.backend.complete([{"role": "user", "content": "Say hello"}], max_tokens=10, json_mode=False)
+
+    def is_cached(self, resume_text, job_description):
+        """True if an analysis of resume_text against job_description is already cached"""
+        if self.cache is None:
+            return False
+        return self.cache.contains(cache_key(resume_text, job_description, self.model, self.prompt_version))
+
+    def fit(self, resume_text):
+        """The part of the resume sent to the LLM"""
+        if self.section_aware:
+            return fit_sections(resume_text, RESUME_CHAR_LIMIT)
+        return resume_text[:RESUME_CHAR_LIMIT]
+
+    def _retry_delay(self, error, attempt):
+        """Seconds to wait before retrying `error`, or None if it should not be retried"""
+        status = getattr(error, "status_code", None)
+        if status is None:
+            status = getattr(error, "http_status", None)
+        retryable = status in RETRYABLE_STATUS_CODES
+        for name in ("APIConnectionError", "APITimeoutError", "RateLimitError"):
+            error_type = getattr(openai, name, None)
+            if error_type is not None and isinstance(error, error_type):
+                retryable = True
+        if not retryable or attempt >= self.max_retries:
+            return None
+
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None) or {}
+        retry_after = headers.get("retry-after")
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        delay = min(self.backoff_base * (2 ** attempt), self.backoff_max)
+        return delay * (0.5 + random.random() / 2)
+
+    def request(self, messages, completion_tokens=COMPLETION_TOKENS_ESTIMATE):
+        """Send one chat completion through the rate limiter, retrying transient failures"""
+        tokens = sum(estimate_tokens(m["content"]) for m in messages) + completion_tokens
+        attempt = 0
+        while True:
+            self.limiter.acquire(tokens)
+            try:
+                with metrics.timer("llm_call"):
+                    content = self.backend.complete(messages)
+                metrics.inc("llm_requests_total", outcome="ok")
+                return content
+            except Exception as e:
+                metrics.inc("llm_requests_total", outcome="error")
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                attempt += 1
+                metrics.inc("llm_retries_total")
+                print(f"Retrying LLM request in {delay:.1f}s (attempt {attempt}/{self.max_retries}): {str(e)}")
+                time.sleep(delay)
+
+    def _lookup(self, idx, resume_text, job_description):
+        """
+        Return (result, cache key). result is set when no LLM call is needed:
+        the text is unusable or its analysis is cached.
+        """
+        print(f"Resume {idx} text length: {len(resume_text)}")
+
+        # Ensure resume text isn't empty
+        if not resume_text or len(resume_text.strip()) < 50:
+            print(f"Warning: Resume {idx} has insufficient text")
+            return error_result(idx, ["Error: Could not extract sufficient text from PDF"],
+                                ["Please check PDF quality and format"]), None
+
+        key = None
+        if self.cache is not None:
+            key = cache_key(resume_text, job_description, self.model, self.prompt_version)
+            cached = self.cache.get(key)
+            if cached is not None:
+                print(f"Cache hit for resume {idx}")
+                metrics.inc("analysis_cache_hits_total")
+                return {"resume_idx": idx, **normalize_analysis(cached)}, key
+            metrics.inc("analysis_cache_misses_total")
+        return None, key
+
+    def score_one(self, idx, resume_text, job_description, looked_up=False, key=None):
+        """
+        Score a single resume; failures are reported in the result, never raised.
+        Pass looked_up=True (with its cache key) if _lookup already ran for it.
+        """
+        analysis = None
+        try:
+            if not looked_up:
+                result, key = self._lookup(idx, resume_text, job_description)
+                if result is not None:
+                    return result
+
+            with metrics.timer("prompt_build"):
+                prompt = build_prompt(self.fit(resume_text), job_description)
+            analysis = self.request([
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ])
+            print(f"Got response for resume {idx}")
+
+            with metrics.timer("json_parse"):
+                analysis_json = json.loads(analysis)
+            result = normalize_analysis(analysis_json)
+            if key is not None:
+                self.cache.put(key, result)
+            return {"resume_idx": idx, **result}
+        except json.JSONDecodeError as e:
+            print(f"JSON parsing error for resume {idx}: {str(e)}")
+            print(f"Raw response: {analysis if analysis is not None else 'No response'}")
+            metrics.inc("errors_total", stage="json_parse")
+            return error_result(idx, ["Error in parsing analysis"], ["Technical error - contact administrator"])
+        except Exception as e:
+            print(f"Error analyzing resume {idx}: {str(e)}")
+            metrics.inc("errors_total", stage="llm_call")
+            return error_result(idx, ["Error in analysis"], ["Technical error - contact administrator"])
+
+    def make_batches(self, entries, job_description):
+        """
+        Group (idx, resume_text, key) entries into batches of at most
+        batch_size resumes whose prompt fits in batch_token_budget tokens.
+        """
+        overhead = estimate_tokens(build_batch_prompt([], job_description))
+        batches, batch, batch_tokens = [], [], overhead
+        for entry in entries:
+            tokens = estimate_tokens(self.fit(entry[1])) + 5
+            if batch and (len(batch) >= self.batch_size or batch_tokens + tokens > self.batch_token_budget):
+                batches.append(batch)
+                batch, batch_tokens = [], overhead
+            batch.append(entry)
+            batch_tokens += tokens
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def score_batch(self, batch, job_description):
+        """
+        Score (idx, resume_text, key) entries in one request. Returns
+        (results, entries to score one by one): if the reply is malformed,
+        or leaves some resumes out, those fall back to per-resume calls.
+        """
+        labels = {f"R{position + 1}": entry for position, entry in enumerate(batch)}
+        analysis = None
+        try:
+            with metrics.timer("prompt_build"):
+                prompt = build_batch_prompt(
+                    [(label, self.fit(entry[1])) for label, entry in labels.items()], job_description
+                )
+            analysis = self.request([
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ], completion_tokens=COMPLETION_TOKENS_ESTIMATE * len(batch))
+            print(f"Got batch response for resumes {[entry[0] for entry in batch]}")
+            with metrics.timer("json_parse"):
+                parsed = parse_batch_reply(analysis, labels)
+        except (json.JSONDecodeError, ValueError) as e:
+            print(f"Malformed batch reply, scoring {len(batch)} resumes one by one: {str(e)}")
+            metrics.inc("errors_total", stage="json_parse")
+            metrics.inc("batch_fallbacks_total", len(batch))
+            return [], batch
+        except Exception as e:
+            print(f"Error analyzing batch {[entry[0] for entry in batch]}: {str(e)}")
+            metrics.inc("errors_total", stage="llm_call")
+            return [error_result(entry[0], ["Error in analysis"], ["Technical error - contact administrator"])
+                    for entry in batch], []
+
+        results, fallback = [], []
+        for label, (idx, resume_text, key) in labels.items():
+            if label not in parsed:
+                fallback.append((idx, resume_text, key))
+                continue
+            if key is not None:
+                self.cache.put(key, parsed[label])
+            results.append({"resume_idx": idx, **parsed[label]})
+        if fallback:
+            print(f"Batch reply left out {len(fallback)} resumes; scoring them one by one")
+            metrics.inc("batch_fallbacks_total", len(fallback))
+        return results, fallback
+
+    def score_all(self, resumes_text, job_description, on_result=None, indices=None):
+        """
+        Score resumes concurrently. By default every resume is scored and
+        results are returned in resume_idx order; pass indices to score only
+        those resumes, returned in the order given.
+        on_result(result) is called as each resume finishes, in completion order.
+        With batch_size > 1, resumes that need the LLM are sent several per request.
+        """
+        indices = list(range(len(resumes_text)) if indices is None else indices)
+        if not indices:
+            return []
+        results = {}
+
+        def finish(result):
+            results[result["resume_idx"]] = result
+            if on_result is not None:
+                on_result(result)
+
+        # Resolve cache hits and unusable text up front so batches only carry real work
+        pending = []
+        for idx in indices:
+            result, key = self._lookup(idx, resumes_text[idx], job_description)
+            if result is not None:
+                finish(result)
+            else:
+                pending.append((idx, resumes_text[idx], key))
+
+        if self.batch_size > 1:
+            batches = self.make_batches(pending, job_description)
+        else:
+            batches = [[entry] for entry in pending]
+        if batches:
+            print(f"Scoring {len(pending)} resumes in {len(batches)} requests "
+                  f"with up to {self.concurrency} in flight")
+            with ThreadPoolExecutor(max_workers=min(self.concurrency, len(batches))) as executor:
+                score_one = propagate_trace(self.score_one)
+                score_batch = propagate_trace(self.score_batch)
+
+                def submit_one(idx, resume_text, key):
+                    return executor.submit(lambda: ([score_one(idx, resume_text, job_description, True, key)], []))
+
+                futures = {submit_one(*batch[0]) if len(batch) == 1 else
+                           executor.submit(score_batch, batch, job_description) for batch in batches}
+                while futures:
+                    done, futures = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        batch_results, fallback = future.result()
+                        for result in batch_results:
+                            finish(result)
+                        futures.update(submit_one(*entry) for entry in fallback)
+        if self.cache is not None:
+            print(f"Analysis cache: {self.cache.stats()}")
+        return [results[idx] for idx in indices]
@@ -0,0 +1,103 @@
+# sections.py - Split resume text on its section headers and fit it to a character budget
+import re
+
+# Normalized header text -> section kind
+SECTION_HEADERS = {
+    **dict.fromkeys(["summary", "profile", "professional summary", "profile summary", "career summary",
+                     "objective", "career objective", "about", "about me"], "summary"),
+    **dict.fromkeys(["experience", "work experience", "professional experience", "employment",
+                     "employment history", "work history", "career history", "relevant experience"], "experience"),
+    **dict.fromkeys(["skills", "technical skills", "key skills", "core skills", "skills and tools",
+                     "competencies", "core competencies", "technologies", "tech stack"], "skills"),
+    **dict.fromkeys(["projects", "key projects", "selected projects", "personal projects",
+                     "academic projects"], "projects"),
+    **dict.fromkeys(["education", "academic background", "education and training", "qualifications",
+                     "academic qualifications"], "education"),
+    **dict.fromkeys(["certifications", "certificates", "licenses and certifications", "courses",
+                     "training"], "certifications"),
+    **dict.fromkeys(["achievements", "awards", "honors", "honours", "publications", "interests", "hobbies",
+                     "languages", "references", "volunteering", "volunteer experience",
+                     "extracurricular activities", "personal details"], "other"),
+}
+
+# Kinds that share the budget first; "other" sections only get what is left over
+RELEVANT_KINDS = {"preamble", "summary", "experience", "skills", "projects", "education", "certifications"}
+
+MAX_HEADER_LENGTH = 40
+
+
+def header_kind(line):
+    """The section kind if the line is a section header on its own, else None"""
+    line = line.strip()
+    if not line or len(line) > MAX_HEADER_LENGTH:
+        return None
+    normalized = re.sub(r'[^a-z ]', ' ', line.lower().replace('&', ' and '))
+    return SECTION_HEADERS.get(" ".join(normalized.split()))
+
+
+def split_sections(text):
+    """
+    [(kind, text)] in document order; text before the first header is the
+    "preamble" (name, contact details). Concatenating the texts gives back
+    the original text.
+    """
+    sections = []
+    kind, lines = "preamble", []
+    for line in text.splitlines(keepends=True):
+        line_kind = header_kind(line)
+        if line_kind is not None:
+            if lines:
+                sections.append((kind, "".join(lines)))
+            kind, lines = line_kind, []
+        lines.append(line)
+    if lines:
+        sections.append((kind, "".join(lines)))
+    return sections
+
+
+def _share_out(lengths, budget):
+    """Split budget over items of the given lengths, as evenly as their lengths allow"""
+    shares = [0] * len(lengths)
+    remaining = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    while remaining and budget > 0:
+        share = budget // len(remaining)
+        i = remaining.pop(0)
+        shares[i] = min(lengths[i], share if remaining else budget)
+        budget -= shares[i]
+    return shares
+
+
+def fit_sections(text, limit):
+    """
+    Cut text down to at most limit characters. If it has recognizable
+    section headers, every relevant section (experience, skills, education,
+    ...) keeps its header and an even share of the budget, so the sections
+    after a long work history are not lost; achievements, interests and the
+    like only get what is left. Otherwise it is simply text[:limit].
+    """
+    if len(text) <= limit:
+        return text
+    sections = split_sections(text)
+    if len(sections) < 2:
+        return text[:limit]
+
+    relevant = [i for i, (kind, _) in enumerate(sections) if kind in RELEVANT_KINDS]
+    shares = [0] * len(sections)
+    for i, share in zip(relevant, _share_out([len(sections[i][1]) for i in relevant], limit)):
+        shares[i] = share
+    left_over = limit - sum(shares)
+    for i, (kind, section) in enumerate(sections):
+        if kind not in RELEVANT_KINDS and left_over > 0:
+            shares[i] = min(len(section), left_over)
+            left_over -= shares[i]
+
+    parts = []
+    for (kind, section), share in zip(sections, shares):
+        if share >= len(section):
+            parts.append(section)
+        elif share > 1:
+            # Cut at the last whole line, so the next header stays on its own line
+            cut = section[:share]
+            end = cut.rfind("\n")
+            parts.append(cut[:end + 1] if end > 0 else cut[:-1] + "\n")
+    return "".join(parts)
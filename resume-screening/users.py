@@ -0,0 +1,78 @@
+# users.py - Login accounts in a SQLite store shared by every server process
+#
+#   python users.py add recruiter@example.com --role hr
+import argparse
+import getpass
+import os
+import time
+
+from werkzeug.security import generate_password_hash
+
+from db import connect, open_store
+
+
+class UserStore:
+    """
+    Accounts (email, password hash, role) in SQLite, so every worker process
+    sees the same users. An empty store is seeded with the given default
+    accounts.
+    """
+
+    def __init__(self, path, defaults=None):
+        self.path = path
+        open_store(path)
+        with connect(path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS users (
+                    email TEXT PRIMARY KEY,
+                    password_hash TEXT NOT NULL,
+                    role TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            if defaults and conn.execute("SELECT COUNT(*) FROM users").fetchone()[0] == 0:
+                # INSERT OR IGNORE: several workers may seed an empty store at once
+                conn.executemany(
+                    "INSERT OR IGNORE INTO users (email, password_hash, role, created_at) VALUES (?, ?, ?, ?)",
+                    [(email, user['password'], user['role'], time.time()) for email, user in defaults.items()]
+                )
+
+    def get(self, email):
+        """{"password": hash, "role": role} for the account, or None"""
+        with connect(self.path) as conn:
+            row = conn.execute("SELECT password_hash, role FROM users WHERE email = ?", (email,)).fetchone()
+        return {"password": row["password_hash"], "role": row["role"]} if row else None
+
+    def set(self, email, password, role='hr'):
+        """Create the account, or reset its password and role"""
+        with connect(self.path) as conn:
+            conn.execute(
+                "INSERT INTO users (email, password_hash, role, created_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (email) DO UPDATE SET password_hash = excluded.password_hash, role = excluded.role",
+                (email, generate_password_hash(password), role, time.time())
+            )
+
+    def remove(self, email):
+        with connect(self.path) as conn:
+            return conn.execute("DELETE FROM users WHERE email = ?", (email,)).rowcount > 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Manage resume screening login accounts")
+    parser.add_argument('--store', default=os.environ.get('USER_STORE_PATH', os.path.join('data', 'users.sqlite3')))
+    commands = parser.add_subparsers(dest='command', required=True)
+    add = commands.add_parser('add', help="create an account or reset its password")
+    add.add_argument('email')
+    add.add_argument('--role', default='hr')
+    remove = commands.add_parser('remove', help="delete an account")
+    remove.add_argument('email')
+    args = parser.parse_args()
+
+    store = UserStore(args.store)
+    if args.command == 'add':
+        store.set(args.email, getpass.getpass(f"Password for {args.email}: "), args.role)
+        print(f"Saved {args.email} ({args.role})")
+    elif not store.remove(args.email):
+        raise SystemExit(f"No account {args.email}")
+    else:
+        print(f"Removed {args.email}")